@@ -0,0 +1,82 @@
+import os
+import random
+import numpy as np
+from solver.abstraction import infoset_index, infoset_key, legal_actions, strength_bucket, street_raises
+
+class CFRAgent:
+    """
+    Plays the average strategy of an MCCFR checkpoint (solver/mccfr.py), sampling each
+    action from it. Works from observation vectors alone: the infoset is rebuilt from
+    the hand strength, street, pot, bets and stacks they encode (the street's raise
+    count from the bets), so the observer must match the one the solver ran with.
+    Infosets the solver never reached are checked or called.
+    """
+    def __init__(self, strategy, meta, seed=None):
+        self.strategy = strategy
+        self.meta = meta
+        self.path = None
+        self.seed(seed)
+
+    @classmethod
+    def load(cls, path, seed=None):
+        """From a checkpoint directory; the strategy table is memory-mapped, so loading is instant and workers share its pages."""
+        from solver.mccfr import load_meta
+        agent = cls(np.load(os.path.join(path, 'strategy.npy'), mmap_mode='r'), load_meta(path), seed)
+        agent.path = path
+        return agent
+
+    def __getstate__(self):
+        # Pool workers re-map the checkpoint instead of receiving the table
+        state = self.__dict__.copy()
+        if self.path is not None:
+            state['strategy'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.strategy is None:
+            self.strategy = np.load(os.path.join(self.path, 'strategy.npy'), mmap_mode='r')
+
+    def seed(self, seed):
+        self.rng = random.Random(int(seed) if seed is not None else None)
+
+    def action_probabilities(self, state):
+        """Average strategy over the six actions at an observation vector."""
+        meta = self.meta
+        chips = meta['starting_chips']
+        stack, pot, bet = round(state[6] * chips), round(state[7] * chips * 2), round(state[8] * chips)
+        opp_stack, opp_bet = round(state[9] * chips), round(state[10] * chips)
+        street = round(state[12] * 4)
+        probabilities = np.zeros(6)
+        if stack == 0: # All-in: the environment checks whatever we choose
+            probabilities[1] = 1.0
+            return probabilities
+        raises = min(street_raises(street, bet, opp_bet, meta['blinds'][1]), meta['max_raises'])
+        actions = legal_actions(pot, stack, bet, opp_stack, opp_bet, meta['max_raises'] - raises)
+        key = infoset_key(street, strength_bucket(float(state[0]), meta['num_buckets']), pot, opp_bet - bet,
+                          stack, opp_stack, meta['blinds'][1], raises)
+        weights = self.strategy[infoset_index(key, meta['table_bits']), actions]
+        if weights.sum() > 0:
+            probabilities[actions] = weights / weights.sum()
+        else:
+            probabilities[1] = 1.0
+        return probabilities
+
+    def action_probabilities_batch(self, states):
+        """action_probabilities for an (N, OBSERVATION_DIM) batch, computed once per distinct bucket and betting state."""
+        n = self.meta['num_buckets']
+        buckets = np.minimum(((1.0 - states[:, 0].astype(np.float64)) * n).astype(np.intp), n - 1)
+        _, first, inverse = np.unique(np.column_stack([buckets, states[:, 6:]]), axis=0, return_index=True, return_inverse=True)
+        return np.array([self.action_probabilities(states[i]) for i in first])[inverse.ravel()]
+
+    def select_action(self, state):
+        probabilities = self.action_probabilities(state)
+        r = self.rng.random()
+        for action, p in enumerate(probabilities):
+            r -= p
+            if r < 0:
+                return action
+        return 1
+
+    def select_actions(self, states):
+        return np.array([self.select_action(s) for s in states], dtype=np.int64)
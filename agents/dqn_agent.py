@@ -1,8 +1,13 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
+import copy
 import random
+import numpy as np
 from utils.replay_buffer import ReplayBuffer
+from utils.prioritized_replay_buffer import PrioritizedReplayBuffer
+from utils.profiler import PROFILER
 
 # Neural network approximating Q-values: input = state, output = Q-values for each action
 class DQN(nn.Module):
@@ -18,51 +23,129 @@ class DQN(nn.Module):
         return self.fc3(x)            # Raw Q-values output (no activation)
 
 class DQNAgent:
-    def __init__(self, state_dim, action_dim, lr=1e-3):
-        self.model = DQN(state_dim, action_dim)            # Main Q-network
-        self.target = DQN(state_dim, action_dim)           # Target network for stable learning
+    def __init__(self, state_dim, action_dim, lr=1e-3, prioritized=False, per_alpha=0.6, per_beta=0.4, per_beta_increment=1e-5,
+                 replay_capacity=10000, replay_path=None, replay_features=None, seed=None, train_every=1, updates_per_call=1, compile=None):
+        # Independent streams for weight init, exploration and replay sampling (seed=None: fresh entropy)
+        init_seed, explore_seed, replay_seed = np.random.SeedSequence(seed).generate_state(3)
+        with torch.random.fork_rng(devices=[]):             # Seeded init without touching torch's global RNG
+            torch.manual_seed(int(init_seed))
+            self.model = DQN(state_dim, action_dim)        # Main Q-network
+            self.target = DQN(state_dim, action_dim)       # Target network for stable learning
         self.target.load_state_dict(self.model.state_dict())  # Synchronize target to main initially
-        self.optimizer = optim.Adam(self.model.parameters(), lr=lr)  # Adam optimizer for training
-        self.memory = ReplayBuffer(10000)                   # Experience replay buffer with capacity 10k
+        self.optimizer = optim.Adam(self.model.parameters(), lr=lr, fused=True)  # Adam, all parameters updated in one fused kernel
+        # Networks used for learning: the modules themselves, or compiled/scripted versions sharing their parameters
+        if compile == 'compile':
+            self.online_net, self.target_net = torch.compile(self.model), torch.compile(self.target)
+        elif compile == 'script':
+            self.online_net, self.target_net = torch.jit.script(self.model), torch.jit.script(self.target)
+        elif compile is None:
+            self.online_net, self.target_net = self.model, self.target
+        else:
+            raise ValueError(f"Unknown compile mode {compile!r} (expected None, 'compile' or 'script')")
+        self.train_every = train_every                      # train_step calls between learning rounds
+        self.updates_per_call = updates_per_call            # Gradient steps per learning round
+        self.train_calls = 0
+        self._q_target = {}                                 # Preallocated Bellman targets, one per batch size
+        self.prioritized = prioritized                      # Prioritized (sum-tree) or uniform replay
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(replay_capacity, state_dim, alpha=per_alpha, path=replay_path, seed=replay_seed,
+                                                  features=replay_features)
+        else:
+            self.memory = ReplayBuffer(replay_capacity, state_dim, path=replay_path, seed=replay_seed, features=replay_features)  # Experience replay (in RAM, or memory-mapped under replay_path)
+        self.per_beta = per_beta                            # Importance-sampling exponent, annealed to 1
+        self.per_beta_increment = per_beta_increment
         self.gamma = 0.99                                   # Discount factor for future rewards
         self.epsilon = 1.0                                  # Initial epsilon for epsilon-greedy exploration
         self.epsilon_min = 0.1                              # Minimum epsilon (minimum exploration)
         self.epsilon_decay = 0.995                           # Exponential decay rate of epsilon
         self.action_dim = action_dim                         # Number of discrete actions
+        self.seed(explore_seed)
+
+    # Reset the exploration RNGs (weights and replay are unaffected)
+    def seed(self, seed):
+        self.rng = random.Random(int(seed) if seed is not None else None)  # Scalar epsilon-greedy draws
+        self.np_rng = np.random.default_rng(seed)                           # Batched draws in select_actions
     
     # Choose action based on epsilon-greedy policy
     def select_action(self, state):
-        if random.random() < self.epsilon:                  # With probability epsilon, explore
-            return random.randint(0, self.action_dim - 1)   # Random action
-        state = torch.FloatTensor(state).unsqueeze(0)       # Convert state to tensor and add batch dim
-        with torch.no_grad():
+        if self.rng.random() < self.epsilon:                # With probability epsilon, explore
+            return self.rng.randrange(self.action_dim)      # Random action
+        state = torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0)  # Zero-copy for float32 observations, plus batch dim
+        with torch.no_grad(), PROFILER.section('inference'):
             q = self.model(state)                            # Predict Q-values from main network
         return q.argmax().item()                             # Choose action with highest Q-value
 
+    # Epsilon-greedy over a batch of states (N, state_dim): one forward pass for all greedy rows
+    def select_actions(self, states):
+        states = np.asarray(states, dtype=np.float32)
+        actions = self.np_rng.integers(0, self.action_dim, size=len(states))  # Exploratory actions
+        greedy = self.np_rng.random(len(states)) >= self.epsilon              # Rows that exploit instead
+        if greedy.any():
+            with torch.no_grad(), PROFILER.section('inference'):
+                q = self.model(torch.from_numpy(states[greedy]))
+            actions[greedy] = q.argmax(1).numpy()
+        return actions
+
     # Store experience tuple in replay buffer
     def store(self, s, a, r, s_, done):                     # state, action, reward, next_state, done
         self.memory.push(s, a, r, s_, done)
 
-    # Perform one training step of Q-learning using replay buffer samples
+    # Store N stacked transitions at once (e.g. from vectorized rollouts)
+    def store_batch(self, s, a, r, s_, done):
+        self.memory.push_batch(s, a, r, s_, done)
+
+    # Called after every stored decision: every `train_every` calls, takes `updates_per_call` gradient steps on replay samples
     def train_step(self, batch_size=32):
+        self.train_calls += 1
+        if self.train_calls % self.train_every == 0:
+            self.train_round(batch_size)
+
+    # train_step for `n` decisions stored at once; returns the gradient steps taken
+    def train_steps(self, n, batch_size=32):
+        rounds = (self.train_calls + n) // self.train_every - self.train_calls // self.train_every
+        self.train_calls += n
+        return sum(self.train_round(batch_size) for _ in range(rounds))
+
+    # One learning round: `updates_per_call` gradient steps on replay samples (none until the buffer holds a batch); returns the steps taken
+    def train_round(self, batch_size=32):
         if len(self.memory) < batch_size:
-            return                                          # Not enough samples yet
-        
-        s, a, r, s_, d = self.memory.sample(batch_size)    # Sample random mini-batch
-        s = torch.FloatTensor(s)                            # Convert batch to tensors
-        a = torch.LongTensor(a)
-        r = torch.FloatTensor(r)
-        s_ = torch.FloatTensor(s_)
-        d = torch.FloatTensor(d)
-        
-        q = self.model(s).gather(1, a.unsqueeze(1)).squeeze(1)  # Q-values for taken actions
-        q_next = self.target(s_).max(1)[0]                      # Max Q-value from target network for next states
-        q_target = r + self.gamma * q_next * (1 - d)            # Compute target Q-values (Bellman eq.)
-        
-        loss = nn.MSELoss()(q, q_target.detach())                # Mean squared error loss between Q and target
-        self.optimizer.zero_grad()
-        loss.backward()                                          # Backpropagation of loss
-        self.optimizer.step()                                    # Update network weights
+            return 0
+        for _ in range(self.updates_per_call):
+            with PROFILER.section('replay_sample'):
+                if self.prioritized:
+                    s, a, r, s_, d, weights, indices = self.memory.sample(batch_size, self.per_beta)
+                    self.per_beta = min(1.0, self.per_beta + self.per_beta_increment)
+                else:
+                    s, a, r, s_, d = self.memory.sample(batch_size) # Sample random mini-batch (already tensors)
+
+            td_error = self.learn(s, a, r, s_, d, weights if self.prioritized else None)
+            if self.prioritized:
+                self.memory.update_priorities(indices, td_error.abs().numpy())
+        return self.updates_per_call
+
+    # One gradient step on a given batch of tensors (replay samples or an offline dataset); returns the TD errors
+    def learn(self, s, a, r, s_, d, weights=None):
+        with PROFILER.section('forward'):
+            q = self.online_net(s).gather(1, a.unsqueeze(1)).squeeze(1)  # Q-values for taken actions
+            with torch.no_grad():
+                # Bellman target r + gamma * max Q'(s_) * (1 - d), computed in place in a reused tensor
+                q_target = self._q_target.get(len(r))
+                if q_target is None:
+                    q_target = self._q_target[len(r)] = torch.empty(len(r))
+                torch.amax(self.target_net(s_), 1, out=q_target)
+                q_target.addcmul_(q_target, d, value=-1).mul_(self.gamma).add_(r)
+
+            td_error = q - q_target
+            if weights is not None:
+                loss = (weights * td_error.pow(2)).mean()            # Importance-weighted squared TD error
+            else:
+                loss = F.mse_loss(q, q_target)                       # Mean squared error loss between Q and target
+        with PROFILER.section('backprop'):
+            self.optimizer.zero_grad()
+            loss.backward()                                          # Backpropagation of loss
+            self.optimizer.step()                                    # Update network weights
+        PROFILER.count('grad_steps')
+        return td_error.detach()
 
     # Update target network to match main network parameters (periodically)
     def update_target(self):
@@ -81,4 +164,25 @@ class DQNAgent:
         self.model.load_state_dict(torch.load(path))
         self.target.load_state_dict(self.model.state_dict())
         self.model.eval() # Set model to evaluation mode
-        self.target.eval()
\ No newline at end of file
+        self.target.eval()
+
+    # Everything needed to resume training, as copies the caller can serialize while training goes on
+    def training_state(self, include_replay=True):
+        return {
+            'model': {k: v.clone() for k, v in self.model.state_dict().items()},
+            'target': {k: v.clone() for k, v in self.target.state_dict().items()},
+            'optimizer': copy.deepcopy(self.optimizer.state_dict()),
+            'epsilon': self.epsilon, 'per_beta': self.per_beta, 'train_calls': self.train_calls,
+            'rng': self.rng.getstate(), 'np_rng': self.np_rng.bit_generator.state,
+            'memory': self.memory.state_dict(include_replay),
+        }
+
+    # Restores a training_state() snapshot
+    def load_training_state(self, state):
+        self.model.load_state_dict(state['model'])
+        self.target.load_state_dict(state['target'])
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.epsilon, self.per_beta, self.train_calls = state['epsilon'], state['per_beta'], state['train_calls']
+        self.rng.setstate(state['rng'])
+        self.np_rng.bit_generator.state = state['np_rng']
+        self.memory.load_state_dict(state['memory'])
\ No newline at end of file
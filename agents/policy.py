@@ -0,0 +1,210 @@
+"""
+Inference-only greedy policies for evaluation and serving. Loading one builds no
+optimizer, target network or replay buffer, and the NumPy policy does not import
+torch at all, so a serving process starts in a fraction of the time.
+
+- Policy: the DQN's layers as NumPy float32 matrices, exported to .npz (optionally
+  with int8 weights, dequantized on load)
+- TorchScriptPolicy: a traced DQN, optionally with dynamically int8-quantized Linear
+  layers, exported to .pt and run through torch.jit
+
+    python -m agents.policy export pokerbot_dqn.pth pokerbot_policy.npz --int8
+    python -m agents.policy export pokerbot_dqn.pth pokerbot_policy.pt --int8
+    python -m agents.policy bench pokerbot_policy.npz
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+import numpy as np
+
+class Policy:
+    """
+    Greedy Q-network policy evaluated in NumPy: Linear layers with ReLU between them,
+    as in DQN. Picklable, so evaluation workers receive it directly.
+    """
+    epsilon = 0.0 # Always greedy
+
+    def __init__(self, layers):
+        # (input_dim, output_dim) weight and bias per layer, so a forward pass is x @ w + b
+        self.layers = [(np.ascontiguousarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32)) for w, b in layers]
+        self.state_dim = self.layers[0][0].shape[0]
+
+    @classmethod
+    def from_state_dict(cls, state_dict):
+        """From a DQN state dict (the format of pokerbot_dqn.pth)."""
+        tensors = [t.detach().cpu().numpy() for t in state_dict.values()]
+        return cls([(w.T, b) for w, b in zip(tensors[0::2], tensors[1::2])])
+
+    @classmethod
+    def load(cls, path):
+        """From an .npz written by save(); int8 weights are dequantized with their per-output scales."""
+        with np.load(path) as f:
+            layers = []
+            for i in range(int(f['num_layers'])):
+                w = f[f'w{i}']
+                if f'scale{i}' in f:
+                    w = w.astype(np.float32) * f[f'scale{i}']
+                layers.append((w, f[f'b{i}']))
+        return cls(layers)
+
+    def save(self, path, int8=False):
+        """Writes the layers to an .npz; `int8` stores weights as int8 with one scale per output unit."""
+        arrays = {'num_layers': np.array(len(self.layers))}
+        for i, (w, b) in enumerate(self.layers):
+            if int8:
+                scale = np.maximum(np.abs(w).max(axis=0), 1e-12) / 127
+                arrays[f'w{i}'] = np.round(w / scale).astype(np.int8)
+                arrays[f'scale{i}'] = scale.astype(np.float32)
+            else:
+                arrays[f'w{i}'] = w
+            arrays[f'b{i}'] = b
+        np.savez(path, **arrays)
+
+    def q_values(self, states):
+        x = np.asarray(states, dtype=np.float32)
+        for w, b in self.layers[:-1]:
+            x = x @ w
+            x += b
+            np.maximum(x, 0, out=x)
+        w, b = self.layers[-1]
+        return x @ w + b
+
+    def select_action(self, state):
+        return int(self.q_values(state).argmax())
+
+    def select_actions(self, states):
+        return self.q_values(states).argmax(axis=1)
+
+    def seed(self, seed):
+        pass # Deterministic; kept for the agent interface
+
+class TorchScriptPolicy:
+    """Greedy policy running an exported TorchScript module. Pickles as its path."""
+    epsilon = 0.0
+
+    def __init__(self, path, num_threads=1):
+        import torch
+        self.path = path
+        self.num_threads = num_threads
+        if num_threads:
+            torch.set_num_threads(num_threads) # Small matmuls are fastest on one thread
+        extra_files = {'policy.json': ''}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', FutureWarning) # torch.jit deprecation notices
+            self.model = torch.jit.load(path, _extra_files=extra_files).eval()
+        self.state_dim = json.loads(extra_files['policy.json'])['state_dim']
+        self._torch = torch
+
+    def __getstate__(self):
+        return {'path': self.path, 'num_threads': self.num_threads}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['num_threads'])
+
+    def q_values(self, states):
+        torch = self._torch
+        x = torch.from_numpy(np.asarray(states, dtype=np.float32))
+        with torch.inference_mode():
+            return self.model(x).numpy()
+
+    def select_action(self, state):
+        return int(self.q_values(np.asarray(state, dtype=np.float32)[None]).argmax())
+
+    def select_actions(self, states):
+        if len(states) == 0:
+            return np.empty(0, dtype=np.int64) # Quantized kernels reject empty batches
+        return self.q_values(states).argmax(axis=1)
+
+    def seed(self, seed):
+        pass
+
+def load_policy(path, num_threads=1):
+    """
+    A greedy policy from an exported .npz or .pt file, or straight from a DQN state
+    dict (.pth). A directory is taken to be an MCCFR checkpoint and loaded as a CFRAgent.
+    """
+    if os.path.isdir(path):
+        from agents.cfr_agent import CFRAgent
+        return CFRAgent.load(path)
+    extension = os.path.splitext(path)[1]
+    if extension == '.npz':
+        return Policy.load(path)
+    if extension == '.pth':
+        import torch
+        return Policy.from_state_dict(torch.load(path, map_location='cpu'))
+    return TorchScriptPolicy(path, num_threads)
+
+def as_policy(agent):
+    """A NumPy Policy snapshot of a DQNAgent's network; any other agent (a policy, CFRAgent, ...) as is."""
+    if isinstance(agent, (Policy, TorchScriptPolicy)) or not hasattr(agent, 'model'):
+        return agent
+    return Policy.from_state_dict(agent.model.state_dict())
+
+def export_policy(model_path, out_path, int8=False):
+    """Exports a DQN state dict to .npz (NumPy Policy) or, for any other extension, a traced TorchScript file."""
+    import torch
+    state_dict = torch.load(model_path, map_location='cpu')
+    if out_path.endswith('.npz'):
+        Policy.from_state_dict(state_dict).save(out_path, int8)
+        return
+    from agents.dqn_agent import DQN
+    state_dim, action_dim = state_dict['fc1.weight'].shape[1], state_dict['fc3.weight'].shape[0]
+    model = DQN(state_dim, action_dim)
+    model.load_state_dict(state_dict)
+    model.eval()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore') # torch.ao quantization and torch.jit deprecation notices
+        if int8:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        traced = torch.jit.trace(model, torch.zeros(1, state_dim))
+        torch.jit.save(torch.jit.freeze(traced), out_path,
+                       _extra_files={'policy.json': json.dumps({'state_dim': state_dim, 'action_dim': action_dim})})
+
+def benchmark(path, decisions=20000, batch=500, seed=0):
+    """Load time, single-decision latency and batched throughput of an exported policy."""
+    start = time.perf_counter()
+    policy = load_policy(path)
+    load_time = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    states = rng.random((1024, policy.state_dim), dtype=np.float32)
+    for s in states[:100]:
+        policy.select_action(s) # Warm-up
+    start = time.perf_counter()
+    for i in range(decisions):
+        policy.select_action(states[i % len(states)])
+    latency = (time.perf_counter() - start) / decisions
+
+    start = time.perf_counter()
+    for _ in range(100):
+        policy.select_actions(states[:batch])
+    throughput = 100 * batch / (time.perf_counter() - start)
+    return {'path': path, 'load_ms': round(load_time * 1e3, 2), 'us_per_decision': round(latency * 1e6, 2),
+            'batched_decisions_per_sec': round(throughput)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the trained DQN as an inference-only policy, or time one.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="convert a .pth state dict to .npz (NumPy) or .pt (TorchScript)")
+    export.add_argument('model', help="DQN state dict, e.g. pokerbot_dqn.pth")
+    export.add_argument('output', help="pokerbot_policy.npz or pokerbot_policy.pt")
+    export.add_argument('--int8', action='store_true', help="quantize the weights to int8")
+    bench = commands.add_parser('bench', help="time loading and per-decision latency")
+    bench.add_argument('path')
+    bench.add_argument('--decisions', type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_policy(args.model, args.output, args.int8)
+        reference, exported = load_policy(args.model), load_policy(args.output)
+        states = np.random.default_rng(0).random((10000, reference.state_dim), dtype=np.float32)
+        agreement = (reference.select_actions(states) == exported.select_actions(states)).mean()
+        print(json.dumps({'output': args.output, 'bytes': os.path.getsize(args.output),
+                          'action_agreement': round(float(agreement), 4)}))
+    else:
+        print(json.dumps(benchmark(args.path, args.decisions)))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 import random
+import numpy as np
 
 class RandomAgent:
-    def __init__(self, action_dim):
+    def __init__(self, action_dim, seed=None):
         self.action_dim = action_dim
+        self.seed(seed)
+    def seed(self, seed):
+        """Resets the agent's own RNGs (seed=None: fresh entropy)."""
+        self.rng = random.Random(int(seed) if seed is not None else None)
+        self.np_rng = np.random.default_rng(seed)
     def select_action(self, state):
-        return random.randint(0, self.action_dim - 1)
\ No newline at end of file
+        return self.rng.randrange(self.action_dim)
+    def select_actions(self, states):
+        return self.np_rng.integers(0, self.action_dim, size=len(states))
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Sample-efficiency benchmark: uniform vs prioritized replay.
+
+Trains one agent per replay mode from identical seeds, evaluates the greedy policy
+against the RandomAgent every --eval-every training hands, and reports how many
+training hands each mode needed to reach --target BB/100.
+
+    python -m benchmarks.replay_sample_efficiency --hands 5000 --target 100
+"""
+import argparse
+import json
+from game.environment import PokerEnvironment
+from game.player import Player
+from agents.dqn_agent import DQNAgent
+from agents.random_agent import RandomAgent
+from config.config import *
+from training.train import make_observer, play_training_hand, spawn_seeds
+from evaluate_bot import BIG_BLIND, play_hands
+
+def run(prioritized, args):
+    env_seed, agent_seed, opponent_seed, eval_seed = spawn_seeds(args.seed, 4)
+    env = PokerEnvironment([Player('DQN', chips=STARTING_CHIPS), Player('Random', chips=STARTING_CHIPS)],
+                           observer=make_observer(), seed=env_seed)
+    agent = DQNAgent(STATE_DIM, ACTION_DIM, lr=5e-4, prioritized=prioritized, per_alpha=PER_ALPHA, per_beta=PER_BETA, seed=agent_seed)
+    opponent = RandomAgent(ACTION_DIM, seed=opponent_seed)
+
+    curve = []
+    hands_to_target = None
+    for episode in range(1, args.hands + 1):
+        play_training_hand(env, agent, opponent)
+        if episode % TARGET_UPDATE == 0:
+            agent.update_target()
+        if episode % 10 == 0:
+            agent.decay_epsilon()
+
+        if episode % args.eval_every == 0:
+            epsilon, agent.epsilon = agent.epsilon, 0.0
+            _, total_reward = play_hands(agent, opponent, args.eval_hands, seed=eval_seed)
+            agent.epsilon = epsilon
+
+            bb_per_100 = total_reward / BIG_BLIND / args.eval_hands * 100
+            curve.append((episode, bb_per_100))
+            print(json.dumps({'replay': 'prioritized' if prioritized else 'uniform', 'hands': episode, 'bb_per_100': round(bb_per_100, 2)}))
+            if hands_to_target is None and bb_per_100 >= args.target:
+                hands_to_target = episode
+                if args.stop_at_target:
+                    break
+    return hands_to_target, curve
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare uniform and prioritized replay on hands-to-target BB/100.")
+    parser.add_argument('--hands', type=int, default=5000, help="maximum training hands per replay mode")
+    parser.add_argument('--target', type=float, default=100.0, help="target BB/100 against the RandomAgent")
+    parser.add_argument('--eval-every', type=int, default=250)
+    parser.add_argument('--eval-hands', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stop-at-target', action='store_true')
+    args = parser.parse_args()
+
+    results = {}
+    for name, prioritized in (('uniform', False), ('prioritized', True)):
+        hands_to_target, curve = run(prioritized, args)
+        results[name] = {'hands_to_target': hands_to_target, 'final_bb_per_100': round(curve[-1][1], 2) if curve else None}
+    print(json.dumps({'target_bb_per_100': args.target, **results}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark suite: seeded, reproducible throughput/latency scenarios for the hot paths,
+run with one command, written as JSON and compared against a stored baseline.
+
+    python -m benchmarks.suite                         # run everything, compare to baseline.json
+    python -m benchmarks.suite --only evaluator replay # scenarios whose name starts with these
+    python -m benchmarks.suite --save-baseline         # record this machine's numbers as the baseline
+
+Each scenario is timed `--repeat` times and the best run is kept, which is the least
+noisy estimate on a shared machine. Baselines are machine specific: regenerate them on
+the machine you compare on.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import numpy as np
+import torch
+from game.hand_evaluator import evaluate_codes, evaluate_hands
+from game.environment import PokerEnvironment
+from game.player import Player
+from agents.random_agent import RandomAgent
+from agents.dqn_agent import DQNAgent
+from config.config import *
+from training.train import make_observer, play_training_hand, spawn_seeds
+from utils.replay_buffer import ReplayBuffer
+from utils.prioritized_replay_buffer import PrioritizedReplayBuffer
+from benchmarks.env_throughput import hands_per_second
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+REPLAY_CAPACITIES = (10_000, 100_000, 1_000_000)
+
+def _seed(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def _best(run, repeat):
+    """Best (minimum) wall time of `repeat` calls to run()."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def bench_env(args):
+    """Random-vs-random hands/sec of the scalar environment."""
+    hands = max(hands_per_second(args.scale * 20000, args.seed)[0] for _ in range(args.repeat))
+    return {'env_random_hands': (hands, 'hands/s', True)}
+
+def bench_evaluator(args):
+    """Scalar evaluate_codes calls/sec and batched evaluate_hands rows/sec on 5/6/7 cards."""
+    results = {}
+    rng = np.random.default_rng(args.seed)
+    n = args.scale * 20000
+    for num_cards in (5, 6, 7):
+        cards = np.argsort(rng.random((n, 52)), axis=1)[:, :num_cards]
+        hands, boards = cards[:, :2].tolist(), cards[:, 2:].tolist()
+        def scalar():
+            for h, b in zip(hands, boards):
+                evaluate_codes(h, b)
+        elapsed = _best(scalar, args.repeat)
+        results[f'evaluator_scalar_{num_cards}'] = (n / elapsed, 'calls/s', True)
+
+        elapsed = _best(lambda: evaluate_hands(cards[:, :2], cards[:, 2:]), args.repeat)
+        results[f'evaluator_batch_{num_cards}'] = (n / elapsed, 'hands/s', True)
+    return results
+
+def bench_replay(args):
+    """Latency of sampling a BATCH_SIZE batch from full uniform and prioritized buffers."""
+    results = {}
+    samples = args.scale * 2000
+    for capacity in REPLAY_CAPACITIES:
+        for name, buffer in (('uniform', ReplayBuffer(capacity, STATE_DIM, seed=args.seed)),
+                             ('prioritized', PrioritizedReplayBuffer(capacity, STATE_DIM, seed=args.seed))):
+            rng = np.random.default_rng(args.seed)
+            s = rng.random((capacity, STATE_DIM), dtype=np.float32)
+            buffer.push_batch(s, rng.integers(0, ACTION_DIM, capacity), rng.random(capacity), s, np.zeros(capacity))
+            if name == 'prioritized':
+                sample = lambda: buffer.sample(BATCH_SIZE, 0.4)
+            else:
+                sample = lambda: buffer.sample(BATCH_SIZE)
+            def run():
+                for _ in range(samples):
+                    sample()
+            elapsed = _best(run, args.repeat)
+            results[f'replay_sample_{name}_{capacity}'] = (elapsed / samples * 1e6, 'us', False)
+    return results
+
+def bench_train(args):
+    """End-to-end training episodes/sec: train()'s per-episode loop with the configured encoder."""
+    episodes = args.scale * 100
+    def run():
+        env_seed, agent_seed, opponent_seed = spawn_seeds(args.seed, 3)
+        p1, p2 = Player('DQN', chips=STARTING_CHIPS), Player('Random', chips=STARTING_CHIPS)
+        env = PokerEnvironment([p1, p2], observer=make_observer(), seed=env_seed)
+        agent = DQNAgent(STATE_DIM, ACTION_DIM, lr=5e-4, prioritized=PRIORITIZED_REPLAY, per_alpha=PER_ALPHA, per_beta=PER_BETA,
+                         seed=agent_seed, train_every=TRAIN_EVERY, updates_per_call=UPDATES_PER_TRAIN, compile=LEARNER_COMPILE)
+        opponent = RandomAgent(ACTION_DIM, seed=opponent_seed)
+        for episode in range(episodes):
+            play_training_hand(env, agent, opponent)
+            if episode % TARGET_UPDATE == 0:
+                agent.update_target()
+            if episode % 10 == 0:
+                agent.decay_epsilon()
+    elapsed = _best(run, args.repeat)
+    return {'train_episodes': (episodes / elapsed, 'episodes/s', True)}
+
+def bench_learner(args):
+    """Gradient updates/sec and replayed transitions/sec of train_step, at BATCH_SIZE and at a large batch."""
+    results = {}
+    rng = np.random.default_rng(args.seed)
+    s = rng.random((REPLAY_CAPACITY, STATE_DIM), dtype=np.float32)
+    updates = args.scale * 500
+    for batch_size in (BATCH_SIZE, 1024):
+        agent = DQNAgent(STATE_DIM, ACTION_DIM, lr=5e-4, replay_capacity=REPLAY_CAPACITY, seed=args.seed, compile=LEARNER_COMPILE)
+        agent.store_batch(s, rng.integers(0, ACTION_DIM, REPLAY_CAPACITY), rng.random(REPLAY_CAPACITY), s, np.zeros(REPLAY_CAPACITY))
+        agent.train_step(batch_size) # Warm-up (and compilation, with LEARNER_COMPILE)
+        def run():
+            for _ in range(updates):
+                agent.train_step(batch_size)
+        elapsed = _best(run, args.repeat)
+        results[f'learner_updates_{batch_size}'] = (updates / elapsed, 'updates/s', True)
+        results[f'learner_samples_{batch_size}'] = (updates * batch_size / elapsed, 'samples/s', True)
+    return results
+
+SCENARIOS = {'env': bench_env, 'evaluator': bench_evaluator, 'replay': bench_replay, 'train': bench_train,
+             'learner': bench_learner}
+
+def compare(results, baseline, tolerance):
+    """Ratio of each result to the baseline (>1 = faster) and the names of regressions."""
+    comparison, regressions = {}, []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        speedup = result['value'] / base['value'] if result['higher_is_better'] else base['value'] / result['value']
+        comparison[name] = round(speedup, 3)
+        if speedup < 1 - tolerance:
+            regressions.append(name)
+    return comparison, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare it against a baseline.")
+    parser.add_argument('--only', nargs='*', default=None, help="scenario name prefixes to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per scenario; the best is kept")
+    parser.add_argument('--scale', type=int, default=1, help="multiplier on every scenario's workload")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help="write the results JSON here as well as to stdout")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="overwrite the baseline with these results")
+    parser.add_argument('--tolerance', type=float, default=0.20, help="slowdown beyond which a result is a regression")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1) # Single-threaded numbers are comparable across machines with different core counts
+    results = {}
+    for scenario, bench in SCENARIOS.items():
+        if args.only and not any(scenario.startswith(prefix) for prefix in args.only):
+            continue
+        _seed(args.seed)
+        for name, (value, unit, higher_is_better) in bench(args).items():
+            results[name] = {'value': round(value, 3), 'unit': unit, 'higher_is_better': higher_is_better}
+            print(f"{name:40s} {value:14.2f} {unit}", file=sys.stderr)
+
+    report = {
+        'timestamp': time.time(), 'seed': args.seed, 'scale': args.scale, 'repeat': args.repeat,
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__, 'torch': torch.__version__,
+                    'platform': platform.platform(), 'processor': platform.processor()},
+        'results': results
+    }
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['baseline'] = args.baseline
+        report['speedup_vs_baseline'], report['regressions'] = compare(results, baseline, args.tolerance)
+        for name in report['regressions']:
+            print(f"REGRESSION {name}: {report['speedup_vs_baseline'][name]:.2f}x baseline", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+    sys.exit(1 if report.get('regressions') else 0)
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,58 @@ ACTION_DIM = 6  # fold, call/check, raise min, raise half-pot, raise pot
 EPISODES = 10000
 BATCH_SIZE = 64
 TARGET_UPDATE = 100
-STARTING_CHIPS = 1000
\ No newline at end of file
+STARTING_CHIPS = 1000
+USE_PREFLOP_EQUITY = False  # pre-flop hand strength from the precomputed equity table (False = Chen heuristic, as pokerbot_dqn.pth was trained)
+USE_POSTFLOP_EQUITY = False  # post-flop hand strength from estimate_equity (False = raw evaluator rank, as pokerbot_dqn.pth was trained)
+EQUITY_SAMPLES = 500  # Monte Carlo rollouts per flop equity estimate (turn and river are enumerated exactly)
+NUM_WORKERS = 0  # rollout worker processes for actor/learner training (0 = single-process train())
+ROLLOUT_CHUNK = 256  # transitions a worker batches up before sending them to the learner
+WEIGHT_SYNC_INTERVAL = 500  # learner gradient steps between weight broadcasts to the workers
+PRIORITIZED_REPLAY = False  # sample replay by TD-error priority (sum-tree) instead of uniformly
+PER_ALPHA = 0.6  # how strongly priorities skew sampling (0 = uniform)
+PER_BETA = 0.4  # initial importance-sampling correction, annealed to 1 over training
+REPLAY_CAPACITY = 10000  # transitions kept in the replay buffer
+REPLAY_PATH = None  # directory of a memory-mapped replay buffer, resumed across runs with the same features (None = in RAM only)
+PROFILE = False  # time the training/evaluation hot paths and report throughput and a per-stage breakdown
+PROFILE_INTERVAL = 1000  # hands between profiler reports
+METRICS_PATH = 'metrics.jsonl'  # file the profiler appends one JSON record per report to
+SEED = None  # seed for deals, agents, replay sampling and torch (None = a fresh run each time)
+HAND_HISTORY_PATH = None  # binary hand-history log of training (replay with python -m game.hand_history replay <path>)
+OFFLINE_CHUNK_SIZE = 65536  # transitions per chunk the offline loader reads or decodes at a time
+OFFLINE_PREFETCH = 8  # batches the offline loader keeps decoded ahead of the learner
+OFFLINE_TARGET_UPDATE = 1000  # offline gradient steps between target network syncs
+TRAIN_EVERY = 1  # agent decisions between learning rounds (raise together with BATCH_SIZE to cut per-update overhead)
+UPDATES_PER_TRAIN = 1  # gradient steps per learning round
+LEARNER_COMPILE = None  # 'compile' (torch.compile) or 'script' (TorchScript) for the learner's networks; None = eager
+TORCH_NUM_THREADS = None  # intra-op threads for the learner (None = torch's default)
+CFR_PATH = 'cfr_tables'  # MCCFR checkpoint directory (regret and strategy tables), resumed across runs
+CFR_ITERATIONS = 100000  # MCCFR iterations per solver run
+CFR_WORKERS = 0  # solver processes sharing the tables (0 = single process)
+CFR_CHECKPOINT_INTERVAL = 10000  # iterations between table checkpoints
+CFR_BUCKETS = 10  # hand-strength buckets of the card abstraction
+CFR_MAX_RAISES = 2  # raises per street in the solver's game tree, at most 2 (later raises are pruned)
+CFR_TABLE_BITS = 20  # log2 of the rows the hashed infosets are spread over
+BR_DEALS = 2000  # seeded deals the best response is fit on, and again as many held-out ones it is scored on
+BR_BUCKETS = 10  # hand-strength buckets the best response can tell apart
+BR_SEED = 0  # seed of those deals, fixed so every checkpoint is scored on the same hands
+LEAGUE = False  # train against a pool of past snapshots of the DQN (training/league.py) instead of the random agent
+LEAGUE_PATH = 'league'  # directory of the league's snapshots and results, resumed across runs
+LEAGUE_TABLES = 64  # tables played at once, each against its own league opponent
+LEAGUE_MATCH_HANDS = 20  # hands a table plays against one opponent before drawing the next
+LEAGUE_SNAPSHOT_INTERVAL = 1000  # hands between snapshots of the learner added to the pool
+LEAGUE_POOL_SIZE = 16  # snapshots kept in the pool (the oldest is dropped)
+LEAGUE_CACHE_SIZE = 8  # snapshot policies kept loaded in memory (LRU)
+LEAGUE_PFSP_POWER = 2.0  # how strongly opponent sampling favours the ones the learner beats least (0 = uniform)
+CHECKPOINT_PATH = 'checkpoints'  # directory of full training-state checkpoints, written in the background (None = no checkpoints)
+CHECKPOINT_INTERVAL = 1000  # episodes between checkpoints
+CHECKPOINT_KEEP = 2  # most recent checkpoints kept on disk
+CHECKPOINT_REPLAY = True  # include a copy of an in-RAM replay buffer in checkpoints (an on-disk one persists at REPLAY_PATH)
+RESUME = False  # train() continues from the latest checkpoint in CHECKPOINT_PATH (also the --resume flag)
+HISTORY_PATH = 'chips_history.csv'  # per-episode chips and epsilon, streamed during train()
+PLOT_PATH = 'chips_history.png'  # image the P/L curve is rendered to at the end of training
+SERVE_SOCKET = None  # Unix socket the serving process listens on (None = TCP on localhost)
+SERVE_PORT = 8765  # localhost TCP port of the serving process
+SERVE_BATCH_WINDOW_MS = 0.0  # extra time a batch waits for more requests (0 = batch whatever arrived while the last batch ran)
+SERVE_MAX_BATCH = 256  # requests answered by one forward pass at most
+SERVE_RELOAD_INTERVAL = 2.0  # seconds between checks of the served model file for a new checkpoint
+SERVE_STATS_INTERVAL = 10.0  # seconds between the server's latency/throughput log lines (0 = off)
\ No newline at end of file
@@ -1,91 +1,95 @@
-import torch
-from game.environment import PokerEnvironment
-from game.player import Player
-from agents.dqn_agent import DQNAgent
+import argparse
+from game.batch_environment import BatchPokerEnvironment
+from agents.policy import load_policy
 from agents.random_agent import RandomAgent
 from config.config import *
-from training.train import encode_state
+from evaluation.harness import evaluate_agent, select_table_actions
+from training.train import make_observer
+from utils.profiler import PROFILER
 import numpy as np
 
 # --- Configuration ---
-EVALUATION_EPISODES = 20000
+EVALUATION_EPISODES = 20000 # Maximum hands; fewer are played if the CI target is reached first
+EVALUATION_TABLES = 500 # Hands played concurrently
+EVALUATION_WORKERS = 0 # Processes sharing the evaluation (0 = run in this process)
+TARGET_CI_WIDTH = 100.0 # Stop once the confidence interval is this narrow, in BB/100 (None = play every hand)
+CONFIDENCE = 0.95
+DUPLICATE_DEALS = False # Play every deal from both seats to cancel out card luck
 BIG_BLIND = 20
+POLICY_PATH = "pokerbot_dqn.pth" # Trained weights, a policy exported with python -m agents.policy export, or a CFR_PATH checkpoint
 
-def evaluate():
-    print(f"Starting evaluation... Running {EVALUATION_EPISODES} hands.")
-    
-    # Setup players
-    p1 = Player('DQN', chips=STARTING_CHIPS)
-    p2 = Player('Random', chips=STARTING_CHIPS)
-    
-    # Setup environment
-    env = PokerEnvironment([p1, p2])
+def play_hands(agent, opponent, num_hands, num_tables=EVALUATION_TABLES, verbose=False, seed=None):
+    """
+    Plays `num_hands` hands of `agent` (seat 0) against `opponent` on concurrent tables.
+    Returns (hands won, total chip profit/loss).
+    """
+    # Setup environment: many tables played in lock-step
+    env = BatchPokerEnvironment(num_tables, starting_chips=STARTING_CHIPS, blinds=(BIG_BLIND // 2, BIG_BLIND),
+                                observer=make_observer(), seed=seed)
 
-    # 1. Load your trained DQN Agent
-    agent = DQNAgent(STATE_DIM, ACTION_DIM)
-    try:
-        agent.load("pokerbot_dqn.pth")
-    except FileNotFoundError:
-        print("Error: 'pokerbot_dqn.pth' not found.")
-        print("Please run main.py to train and save the model first.")
-        return
+    total_wins = 0
+    total_reward = 0 # This is the total chip profit/loss
+    hands_played = 0
 
-    # 2. Set Epsilon to 0 (Exploitation mode)
-    agent.epsilon = 0.0
+    env.reset()
+    while hands_played < num_hands:
+        _, reward, done = env.step(select_table_actions(env, agent, opponent))
 
-    # 3. Setup the opponent
-    opponent = RandomAgent(ACTION_DIM)
+        # Hands are done, record the final rewards (net chip change)
+        finished = reward[done][:num_hands - hands_played]
+        total_wins += int((finished > 0).sum())
+        total_reward += int(finished.sum())
 
-    # 4. Setup tracking
-    total_wins = 0
-    total_reward = 0 # This is the total chip profit/loss
+        previous = hands_played
+        hands_played += len(finished)
+        if verbose and hands_played // 1000 > previous // 1000:
+            print(f"Completed episode {hands_played}/{num_hands}")
 
-    for episode in range(EVALUATION_EPISODES):
-        if p1.chips <= 0 or p2.chips <= 0:
-            p1.reset_chips(STARTING_CHIPS)
-            p2.reset_chips(STARTING_CHIPS)
+    return total_wins, total_reward
 
-        state = env.reset()
-        done = False
-        
-        while not done:
-            s = encode_state(state)
-            
-            if env.current_player_index == 0:
-                action = agent.select_action(s)
-            else:
-                action = opponent.select_action(s)
+def evaluate(max_hands=EVALUATION_EPISODES, num_workers=EVALUATION_WORKERS, target_ci_width=TARGET_CI_WIDTH,
+             duplicate=DUPLICATE_DEALS, seed=0, policy_path=POLICY_PATH):
+    print(f"Starting evaluation... Running up to {max_hands} hands.")
+    
+    # 1. Load the trained policy (greedy, inference only)
+    try:
+        agent = load_policy(policy_path)
+    except FileNotFoundError:
+        print(f"Error: '{policy_path}' not found.")
+        print("Please run main.py to train and save the model first.")
+        return
 
-            next_state, reward, done = env.step(action)
-            
-            state = next_state
-        
-        # Hand is done, record the final reward (net chip change)
-        if reward > 0:
-            total_wins += 1
-        total_reward += reward
+    # 2. Setup the opponent
+    opponent = RandomAgent(ACTION_DIM)
 
-        if (episode + 1) % 1000 == 0:
-            print(f"Completed episode {episode + 1}/{EVALUATION_EPISODES}")
+    PROFILER.configure(PROFILE, METRICS_PATH)
+    # Shards of EVALUATION_TABLES tables, 8 hands each
+    result = evaluate_agent(agent, opponent, max_hands, big_blind=BIG_BLIND, num_workers=num_workers,
+                            num_tables=EVALUATION_TABLES, duplicate=duplicate, confidence=CONFIDENCE,
+                            target_ci_width=target_ci_width, seed=seed, verbose=True)
 
     # --- Print Final Results ---
     print("\n" + "="*30)
     print("--- Evaluation Finished ---")
     print("="*30)
 
-    # --- Calculate Metrics ---
-    winrate = (total_wins / EVALUATION_EPISODES)
-    avg_chips_per_hand = total_reward / EVALUATION_EPISODES
-    
-    # Calculate BB/100
-    total_bb_won = total_reward / BIG_BLIND
-    bb_per_100 = (total_bb_won / EVALUATION_EPISODES) * 100
-
-    print(f"Total Hands Played: {EVALUATION_EPISODES}")
-    print(f"Hand Winrate:       {winrate:.2%}")
-    print(f"Avg. Chips/Hand:    {avg_chips_per_hand:.2f}")
-    print(f"Profitability:      {bb_per_100:.2f} BB/100 hands")
+    print(f"Total Hands Played: {result['hands']}" + (" (stopped early)" if result['stopped_early'] else ""))
+    print(f"Hand Winrate:       {result['win_rate']:.2%}")
+    print(f"Avg. Chips/Hand:    {result['avg_chips_per_hand']:.2f}")
+    print(f"Profitability:      {result['bb_per_100']:.2f} BB/100 hands (SE {result['std_error']:.2f})")
+    print(f"{CONFIDENCE:.0%} CI:             [{result['ci_low']:.2f}, {result['ci_high']:.2f}] BB/100")
+    if result['duplicate']:
+        print("Duplicate deals:    every deal played from both seats")
     print("="*30)
 
 if __name__ == "__main__":
-    evaluate()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Evaluate the trained DQN against the RandomAgent.")
+    parser.add_argument('--hands', type=int, default=EVALUATION_EPISODES, help="maximum hands to play")
+    parser.add_argument('--workers', type=int, default=EVALUATION_WORKERS)
+    parser.add_argument('--target-ci-width', type=float, default=TARGET_CI_WIDTH,
+                        help="stop once the confidence interval is this narrow (BB/100); 0 plays every hand")
+    parser.add_argument('--duplicate', action='store_true', default=DUPLICATE_DEALS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', default=POLICY_PATH, help="model weights (.pth), an exported policy (.npz/.pt) or an MCCFR checkpoint directory")
+    args = parser.parse_args()
+    evaluate(args.hands, args.workers, args.target_ci_width or None, args.duplicate, args.seed, args.policy)
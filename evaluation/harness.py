@@ -0,0 +1,162 @@
+"""
+Evaluation harness: plays the DQN against an opponent in shards of concurrent tables,
+spread over a process pool, and reports BB/100 with its standard error and a
+confidence interval, stopping as soon as the interval is narrow enough.
+
+Each shard gets its own child of one SeedSequence, so results are reproducible for
+a given seed whatever the number of workers. Every table plays a fixed number of
+hands per shard (hands still in progress when a table reaches its quota are dropped),
+so short hands aren't over-represented the way they would be by cutting the run at
+the first N finished hands.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from game.batch_environment import BatchPokerEnvironment
+from agents.policy import as_policy
+from agents.random_agent import RandomAgent
+from config.config import *
+from training.train import make_observer
+from utils.profiler import PROFILER
+
+def select_table_actions(env, agent, opponent):
+    """
+    One batched decision per seat on a BatchPokerEnvironment, with the agent in seat 0.
+    The opponent's tables are encoded from its own seat, except for a RandomAgent,
+    which ignores the state and gets an empty placeholder.
+    """
+    agent_turn = env.current_player_index == 0
+    actions = np.empty(len(agent_turn), dtype=np.int64)
+    with PROFILER.section('observe'):
+        observations = env.observe(mask=agent_turn)
+        if isinstance(opponent, RandomAgent):
+            opponent_observations = np.empty((len(agent_turn) - agent_turn.sum(), 0), dtype=np.float32)
+        else:
+            opponent_observations = env.observe(mask=~agent_turn)
+    with PROFILER.section('select_action'):
+        actions[agent_turn] = agent.select_actions(observations)
+        actions[~agent_turn] = opponent.select_actions(opponent_observations)
+    PROFILER.count('decisions', len(actions))
+    return actions
+
+def play_shard(agent, opponent, seed, num_tables, hands_per_table, big_blind, duplicate=False):
+    """
+    Plays `hands_per_table` hands on each of `num_tables` tables. Returns the agent's
+    chip delta for every hand as a (num_tables, hands_per_table) array; with
+    `duplicate`, rows 2i and 2i + 1 played the same deals from opposite seats.
+    """
+    agent_seed, opponent_seed = seed.generate_state(2)
+    agent.seed(agent_seed)
+    opponent.seed(opponent_seed)
+    env = BatchPokerEnvironment(num_tables, starting_chips=STARTING_CHIPS, blinds=(big_blind // 2, big_blind),
+                                seed=seed, duplicate=duplicate, observer=make_observer())
+
+    deltas = np.zeros((num_tables, hands_per_table), dtype=np.int64)
+    recorded = np.zeros(num_tables, dtype=np.int64)
+    env.reset()
+    while (recorded < hands_per_table).any():
+        actions = select_table_actions(env, agent, opponent)
+        with PROFILER.section('env_step'):
+            _, reward, done = env.step(actions)
+        PROFILER.count('hands', int(done.sum()))
+        rows = np.flatnonzero(done)
+        hand = env.hand_number[rows] - 1 # The finished hand; its row has already been re-dealt
+        keep = hand < hands_per_table
+        deltas[rows[keep], hand[keep]] = reward[rows[keep]]
+        recorded[rows[keep]] += 1
+    return deltas
+
+# Per-process agents for pool workers, set up once by _init_worker
+_worker_agents = None
+
+def _init_worker(policy, opponent, profile):
+    global _worker_agents
+    torch.set_num_threads(1) # One core per worker; parallelism comes from the processes
+    PROFILER.configure(profile)
+    _worker_agents = (policy, opponent)
+
+def _run_shard(seed, num_tables, hands_per_table, big_blind, duplicate):
+    """Plays a shard in a pool worker; returns its deltas and the worker's profiler numbers."""
+    deltas = play_shard(*_worker_agents, seed, num_tables, hands_per_table, big_blind, duplicate)
+    return deltas, PROFILER.take()
+
+def summarize(deltas, big_blind, duplicate=False, confidence=0.95):
+    """
+    BB/100 statistics for a (num_tables, hands) array of chip deltas. With `duplicate`,
+    the two sides of each deal are averaged first, so each deal is one sample.
+    """
+    samples = deltas / big_blind
+    if duplicate:
+        samples = samples.reshape(-1, 2, samples.shape[1]).mean(axis=1)
+    samples = samples.ravel()
+    n = len(samples)
+    mean = samples.mean() * 100
+    std_error = samples.std(ddof=1) / np.sqrt(n) * 100 if n > 1 else float('inf')
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * std_error
+    return {
+        'hands': int(deltas.size), 'win_rate': float((deltas > 0).mean()),
+        'avg_chips_per_hand': float(deltas.mean()), 'bb_per_100': float(mean),
+        'std_error': float(std_error), 'ci_low': float(mean - half_width), 'ci_high': float(mean + half_width),
+        'confidence': confidence, 'duplicate': duplicate
+    }
+
+def evaluate_agent(agent, opponent, max_hands, big_blind=20, num_workers=0, num_tables=250, hands_per_table=8,
+                   duplicate=False, confidence=0.95, target_ci_width=None, seed=0, verbose=False):
+    """
+    Evaluates `agent` greedily against `opponent` for up to `max_hands` hands, in
+    shards of num_tables * hands_per_table hands (the last one with fewer tables). A DQNAgent is played through a
+    NumPy Policy snapshot of its network, any other agent (an exported policy,
+    CFRAgent) as is. Stops early once the confidence interval is at most
+    `target_ci_width` BB/100 wide. Shards run on `num_workers` processes (0 = in this
+    process) and are aggregated in order, so the stopping point depends only on the
+    seed. Returns the `summarize` dict plus 'stopped_early'.
+    """
+    policy = as_policy(agent)
+    unit = 2 if duplicate else 1 # Tables come in pairs for duplicate deals
+    if max_hands < unit:
+        raise ValueError(f"max_hands must be at least {unit}")
+    hands_per_table = min(hands_per_table, max_hands // unit)
+    # Full shards, then one of fewer tables, so that no more than max_hands hands are played
+    shard_tables = [num_tables] * (max_hands // (num_tables * hands_per_table))
+    rest = max_hands % (num_tables * hands_per_table) // (hands_per_table * unit) * unit
+    if rest or not shard_tables:
+        shard_tables.append(max(rest, unit))
+    shards = deque(zip(np.random.SeedSequence(seed).spawn(len(shard_tables)), shard_tables))
+
+    if num_workers > 0:
+        pool = ProcessPoolExecutor(num_workers, mp_context=mp.get_context('spawn'), initializer=_init_worker,
+                                   initargs=(policy, opponent, PROFILER.enabled))
+        run_shard = lambda s, tables: pool.submit(_run_shard, s, tables, hands_per_table, big_blind, duplicate)
+    else:
+        pool = None
+        run_shard = lambda s, tables: play_shard(policy, opponent, s, tables, hands_per_table, big_blind, duplicate)
+
+    pending = deque(run_shard(*shards.popleft()) for _ in range(min(max(num_workers, 1), len(shards))))
+    results = []
+    stopped_early = False
+    try:
+        while pending:
+            shard = pending.popleft()
+            if pool:
+                shard, worker_profile = shard.result()
+                PROFILER.merge(worker_profile)
+            results.append(shard)
+            summary = summarize(np.concatenate(results), big_blind, duplicate, confidence)
+            if verbose:
+                print(f"{summary['hands']} hands: {summary['bb_per_100']:.2f} BB/100 "
+                      f"[{summary['ci_low']:.2f}, {summary['ci_high']:.2f}]")
+            PROFILER.report(shards=len(results), hands=summary['hands'])
+            if target_ci_width is not None and summary['ci_high'] - summary['ci_low'] <= target_ci_width:
+                stopped_early = bool(shards or pending)
+                break
+            if shards:
+                pending.append(run_shard(*shards.popleft()))
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        PROFILER.report(final=True, shards=len(results))
+    summary['stopped_early'] = stopped_early
+    return summary
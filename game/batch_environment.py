@@ -0,0 +1,239 @@
+import numpy as np
+from .environment import BettingRound
+from .hand_evaluator import evaluate_hands
+from .observation import Observer
+from utils.profiler import PROFILER
+
+# Number of community cards visible on each betting round (index = BettingRound)
+BOARD_SIZE = np.array([0, 3, 4, 5, 5])
+
+# Deck order with the two players' hole cards exchanged (mirror side of a duplicate deal)
+SWAP_SEATS = np.r_[2, 3, 0, 1, 4:52]
+
+def _splitmix64(x):
+    """SplitMix64 finalizer: a stateless hash of uint64 counters to well-mixed uint64s."""
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+class BatchPokerEnvironment:
+    """
+    Runs N independent heads-up hands in lock-step, with all table state held in
+    NumPy arrays. Betting and blind rules mirror PokerEnvironment exactly; each row
+    behaves like its own PokerEnvironment whose chips are reset to `starting_chips`
+    whenever a player busts (as the training/evaluation loops do).
+
+    Cards are integer codes 0-51 (suit * 13 + rank, the same order Deck builds them).
+    Row r deals from the permutation deck[r]: player 0 holds deck[r, 0:2], player 1
+    holds deck[r, 2:4] and the board is deck[r, 4:9].
+
+    With `duplicate=True`, tables come in pairs (2i, 2i + 1) that play the same deals
+    from opposite seats: hand k of the odd table has the cards and button of hand k of
+    the even table with the seats exchanged. Decks are a hash of (pair, hand number), so
+    both sides get the same deal however far apart they drift, and every hand starts
+    from `starting_chips` so the two sides are directly comparable.
+    """
+    def __init__(self, num_tables, starting_chips=1000, blinds=(10, 20), seed=None, duplicate=False, observer=None):
+        if duplicate and num_tables % 2:
+            raise ValueError("Duplicate deals need an even number of tables")
+        self.num_tables = num_tables
+        self.starting_chips = starting_chips
+        self.small_blind, self.big_blind = blinds
+        self.rng = np.random.default_rng(seed)
+        self.duplicate = duplicate
+        if duplicate:
+            self.deal_key = self.rng.integers(2 ** 63, dtype=np.uint64)
+        self._rows = np.arange(num_tables)
+        self.observer = observer if observer is not None else Observer(starting_chips)
+
+        n = num_tables
+        self.deck = np.tile(np.arange(52, dtype=np.int8), (n, 1))
+        self.chips = np.full((n, 2), starting_chips, dtype=np.int64)
+        self.starting_stacks = self.chips.copy()  # Chips at the start of the current hand
+        self.bets = np.zeros((n, 2), dtype=np.int64)
+        self.folded = np.zeros((n, 2), dtype=bool)
+        self.all_in = np.zeros((n, 2), dtype=bool)
+        self.pot = np.zeros(n, dtype=np.int64)
+        self.betting_round = np.zeros(n, dtype=np.int8)
+        self.dealer_button_pos = np.full(n, -1, dtype=np.int64)
+        self.current_player_index = np.zeros(n, dtype=np.int64)
+        self.last_raiser_index = np.full(n, -1, dtype=np.int64)
+        self.hand_number = np.full(n, -1, dtype=np.int64)  # Hands dealt on each table so far, minus one
+        self._strength = np.full((n, 2, 4), np.nan, dtype=np.float32)  # Hand strength per seat and street (NaN = not computed)
+
+    def reset(self):
+        """Starts a fresh hand on every table and returns the stacked state."""
+        self._reset_rows(np.ones(self.num_tables, dtype=bool))
+        return self.get_state()
+
+    def _reset_rows(self, mask):
+        rows = self._rows[mask]
+        if rows.size == 0:
+            return
+
+        self.hand_number[rows] += 1
+        self._strength[rows] = np.nan
+        if self.duplicate:
+            self.chips[rows] = self.starting_chips
+            self.deck[rows] = self._duplicate_decks(rows)
+            # The odd table of a pair has the button on the other seat
+            self.dealer_button_pos[rows] = (self.hand_number[rows] + rows) % 2
+        else:
+            # A busted player gets a fresh stack, as in train()/evaluate()
+            busted = (self.chips[rows] <= 0).any(axis=1)
+            self.chips[rows[busted]] = self.starting_chips
+
+            self.deck[rows] = self.rng.permuted(self.deck[rows], axis=1)
+            self.dealer_button_pos[rows] = (self.dealer_button_pos[rows] + 1) % 2
+        self.starting_stacks[rows] = self.chips[rows]
+        self.bets[rows] = 0
+        self.folded[rows] = False
+        self.all_in[rows] = False
+        self.pot[rows] = 0
+        self.betting_round[rows] = BettingRound.PREFLOP
+
+        sb_pos = (self.dealer_button_pos[rows] + 1) % 2
+        bb_pos = self.dealer_button_pos[rows]
+        sb_amount = self._bet(rows, sb_pos, np.full(rows.size, self.small_blind))
+        bb_amount = self._bet(rows, bb_pos, np.full(rows.size, self.big_blind))
+        self.pot[rows] += sb_amount + bb_amount
+
+        # In heads-up, SB/Button acts first pre-flop
+        self.current_player_index[rows] = sb_pos
+        self.last_raiser_index[rows] = bb_pos
+
+    def _duplicate_decks(self, rows):
+        """Deals hand `hand_number` of each row's pair, seats exchanged on odd rows."""
+        deal = (rows // 2).astype(np.uint64) << np.uint64(32) | self.hand_number[rows].astype(np.uint64)
+        counters = deal[:, None] * np.uint64(52) + np.arange(52, dtype=np.uint64)
+        # Sorting 52 independent hashes gives a uniform permutation for the deal
+        deck = np.argsort(_splitmix64(counters ^ self.deal_key), axis=1).astype(np.int8)
+        mirror = rows % 2 == 1
+        deck[mirror] = deck[mirror][:, SWAP_SEATS]
+        return deck
+
+    def _bet(self, rows, seats, amounts):
+        """Vectorized Player.bet: clamps to the stack and flags all-ins."""
+        stacks = self.chips[rows, seats]
+        bet_amount = np.minimum(np.maximum(0, amounts), stacks)
+        self.all_in[rows, seats] |= bet_amount >= stacks
+        self.chips[rows, seats] -= bet_amount
+        self.bets[rows, seats] += bet_amount
+        return bet_amount
+
+    def get_state(self):
+        """Returns the state of every table from the perspective of the player to act."""
+        rows = self._rows
+        cur = self.current_player_index
+        opp = 1 - cur
+        hand = self.deck[rows[:, None], 2 * cur[:, None] + np.arange(2)]
+        community = self.deck[:, 4:9].copy()
+        community[np.arange(5) >= BOARD_SIZE[self.betting_round][:, None]] = -1
+        return {
+            'hand': hand, 'community': community,
+            'chips': self.chips[rows, cur], 'pot': self.pot.copy(),
+            'current_bet': self.bets[rows, cur], 'opponent_chips': self.chips[rows, opp],
+            'opponent_bet': self.bets[rows, opp], 'position': cur.copy(),
+            'betting_round': self.betting_round.copy()
+        }
+
+    def observe(self, mask=None, out=None):
+        """
+        Encodes the state of every table (or of the tables selected by the boolean
+        `mask`) as an (N, OBSERVATION_DIM) float32 array, written into `out` if given.
+        Hand strength is computed once per table, seat and street.
+        """
+        states = self.get_state()
+        rows = self._rows
+        if mask is not None:
+            states = {key: value[mask] for key, value in states.items()}
+            rows = rows[mask]
+        cur = states['position']
+        street = states['betting_round']
+        strengths = self._strength[rows, cur, street]
+        missing = np.isnan(strengths)
+        if missing.any():
+            with PROFILER.section('hand_strength'):
+                strengths[missing] = self.observer.hand_strengths(states['hand'][missing], states['community'][missing])
+            self._strength[rows[missing], cur[missing], street[missing]] = strengths[missing]
+        return self.observer.encode_batch(states, strengths, out)
+
+    def _determine_winners(self, rows):
+        winners = np.where(self.folded[rows, 0], 1, 0)
+        showdown = ~self.folded[rows].any(axis=1)
+        deck = self.deck[rows[showdown]]
+        with PROFILER.section('evaluate_hand'):
+            score0 = evaluate_hands(deck[:, 0:2], deck[:, 4:9])
+            score1 = evaluate_hands(deck[:, 2:4], deck[:, 4:9])
+        winners[showdown] = np.where(score0 <= score1, 0, 1) # Lower is better, ties go to seat 0
+        return winners
+
+    def step(self, actions):
+        """
+        Applies one action per table for whichever player is to act there. Returns the
+        stacked next state, player 0's reward and the done flags. Finished hands are
+        settled and immediately re-dealt, so their rows of the returned state already
+        belong to the next hand.
+        """
+        rows = self._rows
+        actions = np.asarray(actions)
+        cur = self.current_player_index.copy()
+        opp = 1 - cur
+        p_bet = self.bets[rows, cur]
+        o_bet = self.bets[rows, opp]
+        p_chips = self.chips[rows, cur]
+
+        # Player is all-in, they cannot act. Force a "check"
+        actions = np.where(self.all_in[rows, cur], 1, actions)
+        # A min-raise of nothing is a check (else two such raises would pass the turn back and forth forever)
+        actions = np.where((actions == 2) & (o_bet == 0), 1, actions)
+        fold = actions == 0
+        call = actions == 1
+        raise_ = actions >= 2
+
+        amount_to_call = o_bet - p_bet
+        min_raise = amount_to_call + o_bet
+        amount_to_raise = np.select(
+            [actions == 2, actions == 3, actions == 4, actions == 5],
+            [np.minimum(min_raise, p_chips), np.minimum(self.pot // 2, p_chips),
+             np.minimum(self.pot, p_chips), p_chips],
+            0
+        )
+        total_bet_amount = np.where(raise_, amount_to_call + amount_to_raise, amount_to_call)
+
+        betting = call | raise_
+        self.pot[betting] += self._bet(rows[betting], cur[betting], total_bet_amount[betting])
+        self.folded[rows, cur] |= fold
+        self.last_raiser_index[raise_] = cur[raise_]
+
+        # If player called, the betting round is over (unless they were BB and SB just limped)
+        betting_round_over = call & ((amount_to_call > 0) | (self.betting_round > BettingRound.PREFLOP))
+        done = fold.copy()
+
+        # If the round isn't over by a fold or call, move to the next player
+        passing = ~done & ~betting_round_over
+        self.current_player_index[passing] = opp[passing]
+        # If action gets back to the raiser, round is over
+        betting_round_over |= passing & (self.current_player_index == self.last_raiser_index)
+
+        advancing = betting_round_over & ~done
+        self.betting_round[advancing] += 1
+        done |= advancing & (self.betting_round == BettingRound.SHOWDOWN)
+
+        # Post-flop, SB/Button always acts first and there is no raiser yet
+        new_round = advancing & ~done
+        self.bets[new_round] = 0
+        self.current_player_index[new_round] = (self.dealer_button_pos[new_round] + 1) % 2
+        self.last_raiser_index[new_round] = -1
+
+        reward = np.zeros(self.num_tables, dtype=np.int64)
+        finished = rows[done]
+        if finished.size:
+            winners = self._determine_winners(finished)
+            self.chips[finished, winners] += self.pot[finished]
+            self.pot[finished] = 0
+            reward[finished] = self.chips[finished, 0] - self.starting_stacks[finished, 0]
+            self._reset_rows(done)
+
+        return self.get_state(), reward, done
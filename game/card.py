@@ -1,9 +1,21 @@
 class Card:
     SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
     RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
+    __slots__ = ('suit', 'rank', 'code')
 
     def __init__(self, suit, rank):
         self.suit = suit
         self.rank = rank
+        # Integer encoding 0-51 (suit * 13 + rank), the order Deck builds cards in
+        self.code = Card.SUITS.index(suit) * len(Card.RANKS) + Card.RANKS.index(rank)
+
+    @classmethod
+    def from_code(cls, code):
+        """Returns the shared Card for an integer code; decks deal these same 52 objects."""
+        return CARDS[code]
+
     def __repr__(self):
-        return f"{self.rank}{self.suit[0]}"
\ No newline at end of file
+        return f"{self.rank}{self.suit[0]}"
+
+# The 52 interned cards, indexed by code
+CARDS = tuple(Card(s, r) for s in Card.SUITS for r in Card.RANKS)
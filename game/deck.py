@@ -1,12 +1,35 @@
 import random
-from .card import Card
+from .card import CARDS
 
 class Deck:
-    def __init__(self):
-        self.cards = [Card(s, r) for s in Card.SUITS for r in Card.RANKS]
+    """
+    A permutation of the 52 interned cards plus a deal cursor. The shuffle is a lazy
+    Fisher-Yates: each dealt card is swapped in from a uniformly chosen position of the
+    undealt rest, so shuffling only rewinds the cursor and a heads-up hand costs nine
+    random draws instead of a full 52-card shuffle. Nothing is allocated per hand.
+    Draws come from `rng` (a random.Random), so a seeded deck deals reproducibly.
+    """
+    __slots__ = ('cards', 'cursor', 'rng')
+
+    def __init__(self, rng=None):
+        self.cards = list(CARDS)
+        self.cursor = 0
+        self.rng = rng if rng is not None else random.Random()
+
     def shuffle(self):
-        random.shuffle(self.cards)
+        self.cursor = 0
+
+    def _draw(self):
+        cards, i = self.cards, self.cursor
+        j = i + int(self.rng.random() * (52 - i))
+        cards[i], cards[j] = cards[j], cards[i]
+        self.cursor = i + 1
+        return cards[i]
+
     def deal(self, num):
-        dealt = self.cards[:num]
-        self.cards = self.cards[num:]
-        return dealt
\ No newline at end of file
+        return [self._draw() for _ in range(num)]
+
+    def deal_into(self, cards, num):
+        """Appends the next `num` cards to the list `cards`."""
+        for _ in range(num):
+            cards.append(self._draw())
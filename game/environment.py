@@ -1,6 +1,10 @@
+import random
+from .card import CARDS
 from .deck import Deck
 from .table import Table
 from .hand_evaluator import evaluate_hand
+from .observation import Observer
+from utils.profiler import PROFILER
 
 class BettingRound:
     PREFLOP = 0
@@ -21,16 +25,23 @@ def get_raise_amount(action, min_raise, pot, player_chips):
     return 0
 
 class PokerEnvironment:
-    def __init__(self, players, blinds=(10, 20)):
+    def __init__(self, players, blinds=(10, 20), observer=None, seed=None, history=None):
         self.players = players
         self.small_blind, self.big_blind = blinds
-        self.deck = Deck()
-        self.table = None
+        self.rng = random.Random(seed) # Deals come from this stream only (seed=None: fresh entropy)
+        self.deck = Deck(self.rng)
+        self.table = Table(players)
         self.dealer_button_pos = -1
         self.current_player_index = 0
         self.betting_round = BettingRound.PREFLOP
         self.last_raiser_index = -1
         self.done = False
+        # get_state() refreshes this one dict in place rather than building a new one each step
+        self.state = {}
+        self.observer = observer if observer is not None else Observer()
+        self._strength = {} # Hand strength per (seat, board size), for the current hand
+        self.actions = [] # Actions taken this hand, in order
+        self.history = history # Optional HandHistoryWriter that logs every finished hand
 
     def _get_player_positions(self):
         sb_pos = (self.dealer_button_pos + 1) % len(self.players)
@@ -38,15 +49,16 @@ class PokerEnvironment:
         return sb_pos, bb_pos
 
     def reset(self):
-        self.deck = Deck()
         self.deck.shuffle()
         self.dealer_button_pos = (self.dealer_button_pos + 1) % len(self.players)
         
+        # Board, pot and players are cleared in place
+        self.table.reset()
+        self._strength.clear()
+        self.actions.clear()
         for p in self.players:
-            p.reset_hand()
-            p.hand = self.deck.deal(2)
+            self.deck.deal_into(p.hand, 2)
         
-        self.table = Table(self.players)
         self.betting_round = BettingRound.PREFLOP
         self.done = False
 
@@ -65,15 +77,48 @@ class PokerEnvironment:
         return self.get_state()
 
     def get_state(self):
+        """
+        Returns the state from the perspective of the player to act. The dict and the
+        card lists in it are reused, so they are only valid until the next step/reset.
+        """
         p = self.players[self.current_player_index]
         opponent = self.players[(self.current_player_index + 1) % len(self.players)]
-        return {
-            'hand': p.hand, 'community': self.table.community_cards,
-            'chips': p.chips, 'pot': self.table.pot,
-            'current_bet': p.current_bet, 'opponent_chips': opponent.chips,
-            'opponent_bet': opponent.current_bet, 'position': self.current_player_index,
-            'betting_round': self.betting_round
-        }
+        state = self.state
+        state['hand'] = p.hand
+        state['community'] = self.table.community_cards
+        state['chips'] = p.chips
+        state['pot'] = self.table.pot
+        state['current_bet'] = p.current_bet
+        state['opponent_chips'] = opponent.chips
+        state['opponent_bet'] = opponent.current_bet
+        state['position'] = self.current_player_index
+        state['betting_round'] = self.betting_round
+        return state
+
+    def observe(self, out=None):
+        """
+        Encodes get_state() as the float32 observation vector, written into `out` if
+        given. Hand strength is computed once per seat and street.
+        """
+        state = self.get_state()
+        key = (self.current_player_index, len(self.table.community_cards))
+        strength = self._strength.get(key)
+        if strength is None:
+            with PROFILER.section('hand_strength'):
+                strength = self._strength[key] = self.observer.hand_strength(state['hand'], state['community'])
+        return self.observer.encode(state, strength, out)
+
+    def state_dict(self):
+        """What the next hands depend on, between hands: deal RNG, deck order, button and stacks."""
+        return {'rng': self.rng.getstate(), 'deck': [c.code for c in self.deck.cards],
+                'dealer_button_pos': self.dealer_button_pos, 'chips': [p.chips for p in self.players]}
+
+    def load_state_dict(self, state):
+        self.rng.setstate(state['rng'])
+        self.deck.cards[:] = [CARDS[c] for c in state['deck']]
+        self.dealer_button_pos = state['dealer_button_pos']
+        for p, chips in zip(self.players, state['chips']):
+            p.reset_chips(chips)
 
     def _start_new_betting_round(self):
         for p in self.players:
@@ -85,13 +130,13 @@ class PokerEnvironment:
     def _advance_round(self):
         if self.betting_round == BettingRound.PREFLOP:
             self.betting_round = BettingRound.FLOP
-            self.table.community_cards.extend(self.deck.deal(3))
+            self.deck.deal_into(self.table.community_cards, 3)
         elif self.betting_round == BettingRound.FLOP:
             self.betting_round = BettingRound.TURN
-            self.table.community_cards.extend(self.deck.deal(1))
+            self.deck.deal_into(self.table.community_cards, 1)
         elif self.betting_round == BettingRound.TURN:
             self.betting_round = BettingRound.RIVER
-            self.table.community_cards.extend(self.deck.deal(1))
+            self.deck.deal_into(self.table.community_cards, 1)
         else:
             self.betting_round = BettingRound.SHOWDOWN
             self.done = True
@@ -104,7 +149,8 @@ class PokerEnvironment:
         if len(active_players) == 1:
             return active_players[0]
         else:
-            scores = [(p, evaluate_hand(p.hand, self.table.community_cards)) for p in active_players]
+            with PROFILER.section('evaluate_hand'):
+                scores = [(p, evaluate_hand(p.hand, self.table.community_cards)) for p in active_players]
             scores.sort(key=lambda x: x[1]) # Lower is better
             return scores[0][0]
 
@@ -113,10 +159,14 @@ class PokerEnvironment:
         opponent = self.players[(self.current_player_index + 1) % len(self.players)]
         reward = 0
         betting_round_over = False
+        self.actions.append(action)
 
         if p.is_all_in:
             # Player is all-in, they cannot act.
             action = 1 # Force a "check"
+        elif action == 2 and opponent.current_bet == 0:
+            # A min-raise of nothing is a check (else two such raises would pass the turn back and forth forever)
+            action = 1
 
         if action == 0: # Fold
             p.folded = True
@@ -144,8 +194,8 @@ class PokerEnvironment:
             self.last_raiser_index = self.current_player_index
 
         # --- Check for end of hand/round ---
-        active_players = [p for p in self.players if not p.folded]
-        if len(active_players) <= 1:
+        # Only a fold can leave a single player in the hand
+        if action == 0 and sum(not q.folded for q in self.players) <= 1:
             self.done = True
         
         # If the round isn't over by a fold or call, move to the next player
@@ -166,5 +216,7 @@ class PokerEnvironment:
             
             dqn_player = self.players[0]
             reward = dqn_player.chips - dqn_player.starting_chips
+            if self.history is not None:
+                self.history.write_hand(self, reward)
             
         return self.get_state(), reward, self.done
\ No newline at end of file
@@ -1,8 +1,48 @@
-from treys import Card as TreysCard, Evaluator
+from functools import cache, lru_cache
+from itertools import combinations, permutations
+import numpy as np
+from .lookup_tables import load_preflop_equity, load_rank_tables, LOW_BASE, PREFLOP_EQUITY_FILE, RANK_KEY, WORST_HAND
 
 # Rank map for pre-flop evaluation
 RANK_MAP = {r: i for i, r in enumerate('23456789TJQKA')}
 
+# Lookup tables, loaded once (memory-mapped from the .npy cache)
+LOW_INDEX, HIGH_INDEX, UNSUITED_VALUES, FLUSH_VALUES = load_rank_tables()
+# Scalar lookups go through a dict keyed by the full rank key
+_low_ids, _high_ids = np.nonzero(UNSUITED_VALUES)
+_rank_keys = np.flatnonzero(LOW_INDEX >= 0)[_low_ids] + np.flatnonzero(HIGH_INDEX >= 0)[_high_ids] * LOW_BASE
+_UNSUITED = dict(zip(_rank_keys.tolist(), UNSUITED_VALUES[_low_ids, _high_ids].tolist()))
+_FLUSH = FLUSH_VALUES.tolist()
+# Per card code (suit * 13 + rank): rank multiset key, suit and rank bit
+_CODE_KEY = [RANK_KEY[c % 13] for c in range(52)]
+_CODE_SUIT = [c // 13 for c in range(52)]
+_CODE_BIT = [1 << (c % 13) for c in range(52)]
+_CODE_KEY_ARRAY = np.array(_CODE_KEY, dtype=np.int64)
+# _SUIT_BITS[suit, code] is the card's rank bit if it belongs to that suit, else 0
+_SUIT_BITS = np.array([[_CODE_BIT[c] if _CODE_SUIT[c] == s else 0 for c in range(52)] for s in range(4)])
+
+# Equity lookups are cached on the suit-isomorphic form of hand + board
+EQUITY_CACHE_SIZE = 200000
+# Card code relabelings for each of the 24 suit permutations
+_SUIT_RELABELINGS = [[p[c // 13] * 13 + c % 13 for c in range(52)] for p in permutations(range(4))]
+
+# Pre-flop all-in equity against a random hand: pairs on the diagonal, suited hands
+# at [high, low] and offsuit hands at [low, high]
+PREFLOP_EQUITY = load_preflop_equity()
+_PREFLOP_BY_CODE = None
+if PREFLOP_EQUITY is not None:
+    # Expanded to every pair of card codes for O(1) scalar lookups
+    _PREFLOP_BY_CODE = [[0.0] * 52 for _ in range(52)]
+    for c1 in range(52):
+        for c2 in range(52):
+            hi, lo = max(c1 % 13, c2 % 13), min(c1 % 13, c2 % 13)
+            suited = c1 // 13 == c2 // 13
+            _PREFLOP_BY_CODE[c1][c2] = float(PREFLOP_EQUITY[hi, lo] if suited else PREFLOP_EQUITY[lo, hi])
+
+def _missing_preflop_equity():
+    return FileNotFoundError(f"Pre-flop equity table {PREFLOP_EQUITY_FILE} is missing; rebuild it with "
+                             f"`python -m game.preflop_equity --trials 50000 --seed 0` (or set USE_PREFLOP_EQUITY = False)")
+
 def get_preflop_strength(hand):
     """
     Calculates a normalized pre-flop hand strength from 0.0 (worst) to 1.0 (best).
@@ -45,20 +85,140 @@ def get_preflop_strength(hand):
     # Max possible score is 20 (for AA), min is ~0.
     return min(1.0, final_score / 20.0)
 
-def card_to_str(card):
-    return f"{card.rank}{card.suit[0].lower()}"
+def get_preflop_equity(hand):
+    """
+    Looks up the all-in equity (0.0-1.0) of a two-card hand against a random hand.
+    Accepts Card objects or integer card codes.
+    """
+    if _PREFLOP_BY_CODE is None:
+        raise _missing_preflop_equity()
+    c1, c2 = (getattr(c, 'code', c) for c in hand)
+    return _PREFLOP_BY_CODE[c1][c2]
+
+def preflop_equities(hands):
+    """Batched get_preflop_equity for an (N, 2) array of card codes."""
+    if PREFLOP_EQUITY is None:
+        raise _missing_preflop_equity()
+    hands = np.asarray(hands)
+    ranks = hands % 13
+    hi, lo = ranks.max(axis=1), ranks.min(axis=1)
+    suited = hands[:, 0] // 13 == hands[:, 1] // 13
+    return np.where(suited, PREFLOP_EQUITY[hi, lo], PREFLOP_EQUITY[lo, hi])
+
+def evaluate_codes(hand, community_cards):
+    """
+    Evaluates a hand given as integer card codes (0-51) with table lookups.
+    Lower score = stronger hand (1 = royal flush, 7462 = worst high card).
+    """
+    if len(community_cards) == 0 or len(hand) + len(community_cards) < 5:
+        # Pre-flop fallback. The calling function should handle the pre-flop case.
+        return WORST_HAND
+
+    key = 0
+    suits = [0, 0, 0, 0]
+    for c in (*hand, *community_cards):
+        key += _CODE_KEY[c]
+        suits[_CODE_SUIT[c]] |= _CODE_BIT[c]
+    return min(_UNSUITED[key], _FLUSH[suits[0]], _FLUSH[suits[1]], _FLUSH[suits[2]], _FLUSH[suits[3]])
 
 def evaluate_hand(hand, community_cards):
     """
-    Evaluates hand strength using Treys (for post-flop only). Lower score = stronger hand.
+    Evaluates hand strength for Card objects (for post-flop only). Lower score = stronger hand.
+    """
+    return evaluate_codes([c.code for c in hand], [c.code for c in community_cards])
+
+def evaluate_hands(hands, community_cards):
+    """
+    Batched evaluate_codes: `hands` is an (N, 2) array of card codes and
+    `community_cards` an (N, 3-5) array. Returns an (N,) array of scores.
     """
-    # This function should now only be called when there are community cards.
-    if not community_cards or len(hand) + len(community_cards) < 5:
-        # This is a fallback. The calling function should handle the pre-flop case.
-        return 7462 
+    cards = np.concatenate([np.asarray(hands), np.asarray(community_cards)], axis=1).astype(np.intp)
+    if cards.shape[1] < 5:
+        return np.full(len(cards), WORST_HAND, dtype=np.int64)
+    return _evaluate_extended((), cards)
 
-    treys_hand = [TreysCard.new(card_to_str(c)) for c in hand]
-    treys_board = [TreysCard.new(card_to_str(c)) for c in community_cards]
-    evaluator = Evaluator()
-    score = evaluator.evaluate(treys_board, treys_hand)
-    return score
\ No newline at end of file
+def _evaluate_extended(fixed, extra):
+    """
+    Scores the cards in `fixed` plus each row of the (N, k) array `extra`. Rank keys
+    add up and suited rank bits OR together, so the fixed cards are folded in once.
+    """
+    fixed_key = sum(_CODE_KEY[c] for c in fixed)
+    fixed_masks = [0, 0, 0, 0]
+    for c in fixed:
+        fixed_masks[_CODE_SUIT[c]] |= _CODE_BIT[c]
+
+    # Column-by-column adds beat .sum(axis=1) over such short rows
+    keys = np.full(len(extra), fixed_key, dtype=np.int64)
+    for column in extra.T:
+        keys += _CODE_KEY_ARRAY[column]
+    scores = UNSUITED_VALUES[LOW_INDEX[keys % LOW_BASE], HIGH_INDEX[keys // LOW_BASE]].astype(np.int64)
+    for suit in range(4):
+        # Skip suits that can't reach five cards
+        if fixed_masks[suit].bit_count() + extra.shape[1] < 5:
+            continue
+        masks = np.full(len(extra), fixed_masks[suit], dtype=np.int64)
+        for column in extra.T:
+            masks += _SUIT_BITS[suit][column]
+        np.minimum(scores, FLUSH_VALUES[masks], out=scores)
+    return scores
+
+def canonical_cards(hand, board):
+    """
+    Suit-isomorphic canonical form of hand + board: the smallest (sorted hand, sorted
+    board) tuple over all 24 relabelings of the suits. Spots that only differ by suit
+    names map to the same key.
+    """
+    return min(
+        (tuple(sorted([relabel[c] for c in hand])), tuple(sorted([relabel[c] for c in board])))
+        for relabel in _SUIT_RELABELINGS
+    )
+
+@cache
+def _opponent_pairs(num_cards):
+    """Index pairs for every two-card opponent hand out of `num_cards` unseen cards."""
+    return np.array(list(combinations(range(num_cards), 2)), dtype=np.intp)
+
+@cache
+def _turn_outcomes(num_cards):
+    """(river, opponent card, opponent card) index triples out of `num_cards` unseen cards."""
+    pairs = _opponent_pairs(num_cards)
+    river = np.repeat(np.arange(num_cards), len(pairs))
+    opponent = np.tile(pairs, (num_cards, 1))
+    keep = (opponent[:, 0] != river) & (opponent[:, 1] != river)
+    return np.column_stack([river[keep], opponent[keep]])
+
+@lru_cache(maxsize=EQUITY_CACHE_SIZE)
+def _equity(hand, board, n_samples):
+    unseen = np.setdiff1d(np.arange(52), hand + board)
+
+    if len(board) == 5:
+        # River: enumerate every opponent hand
+        hero = _evaluate_extended(hand + board, np.empty((1, 0), dtype=np.intp))
+        villain = _evaluate_extended(board, unseen[_opponent_pairs(len(unseen))])
+    elif len(board) == 4:
+        # Turn: enumerate every river card and opponent hand
+        outcomes = _turn_outcomes(len(unseen))
+        hero = _evaluate_extended(hand + board, unseen[:, None])[outcomes[:, 0]]
+        villain = _evaluate_extended(board, unseen[outcomes])
+    else:
+        # Earlier streets: sample the runout and the opponent hand
+        rng = np.random.default_rng([n_samples, *hand, *board])
+        runout = 5 - len(board)
+        dealt = rng.permuted(np.tile(unseen, (n_samples, 1)), axis=1)[:, :runout + 2]
+        hero = _evaluate_extended(hand + board, dealt[:, :runout])
+        villain = _evaluate_extended(board, dealt)
+
+    return float(((hero < villain).sum() + 0.5 * (hero == villain).sum()) / len(villain))
+
+def estimate_equity(hand, board, n_samples=1000):
+    """
+    Estimates the all-in equity (win + half of ties, 0.0-1.0) of `hand` against a random
+    opponent hand given the `board` so far. Accepts Card objects or integer card codes.
+    River and turn spots are enumerated exactly; earlier streets use `n_samples`
+    vectorized rollouts, seeded from the spot so repeated calls agree. Results are
+    LRU-cached on the suit-isomorphic form of the spot.
+    """
+    hand = [getattr(c, 'code', c) for c in hand]
+    board = [getattr(c, 'code', c) for c in board]
+    canonical_hand, canonical_board = canonical_cards(hand, board)
+    return _equity(canonical_hand, canonical_board, n_samples)
@@ -0,0 +1,195 @@
+"""
+Compact binary hand histories for PokerEnvironment, written as hands finish and
+replayable bit-exactly without any agents.
+
+File layout (little-endian):
+- header: magic b'PKHH', version (u8), number of players (u8), small and big blind (u32)
+- one record per hand: button seat (u8), number of cards dealt (u8), number of actions
+  (u8), every player's stack before the blinds (i32 each), the dealt card codes in deal
+  order (u8 each; hole cards seat by seat, then the board), the actions (u8 each),
+  player 0's reward (i32) and every player's final stack (i32 each)
+
+A heads-up hand takes 30-40 bytes.
+
+    python -m game.hand_history replay hands.bin   # re-simulate and verify every hand
+    python -m game.hand_history show hands.bin --limit 5
+"""
+import argparse
+import json
+import os
+import struct
+import time
+from collections import namedtuple
+import numpy as np
+from .card import CARDS
+from .environment import PokerEnvironment
+from .player import Player
+
+MAGIC = b'PKHH'
+VERSION = 1
+HEADER = struct.Struct('<4sBBII')
+COUNTS = struct.Struct('<BBB')
+
+HandRecord = namedtuple('HandRecord', ['button', 'starting_stacks', 'cards', 'actions', 'reward', 'final_stacks'])
+
+class HandHistoryWriter:
+    """Appends one record per finished hand to a buffered binary file."""
+    def __init__(self, path, num_players=2, blinds=(10, 20)):
+        self.stacks = struct.Struct(f'<{num_players}i')
+        self.result = struct.Struct(f'<i{num_players}i')
+        header = HEADER.pack(MAGIC, VERSION, num_players, *blinds)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # Continue an existing log, which must describe the same game
+            with open(path, 'rb') as f:
+                if f.read(HEADER.size) != header:
+                    raise ValueError(f"{path} is a hand history for a different game")
+            self.file = open(path, 'ab', buffering=1 << 16)
+        else:
+            self.file = open(path, 'wb', buffering=1 << 16)
+            self.file.write(header)
+
+    def write_hand(self, env, reward):
+        """Called by PokerEnvironment.step when a hand finishes."""
+        deck = env.deck
+        cards = deck.cards[:deck.cursor]
+        players = env.players
+        self.file.write(b''.join((
+            COUNTS.pack(env.dealer_button_pos, len(cards), len(env.actions)),
+            self.stacks.pack(*[p.starting_chips for p in players]),
+            bytes([c.code for c in cards]),
+            bytes(env.actions),
+            self.result.pack(reward, *[p.chips for p in players]),
+        )))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_header(data):
+    magic, version, num_players, small_blind, big_blind = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version 1 hand history")
+    return num_players, (small_blind, big_blind)
+
+def read_hands(path):
+    """
+    Returns (num_players, blinds) and an iterator over the file's HandRecords. The file
+    is memory-mapped and decoded one record at a time, so logs larger than RAM stream.
+    """
+    with open(path, 'rb') as f:
+        num_players, blinds = read_header(f.read(HEADER.size))
+    stacks = struct.Struct(f'<{num_players}i')
+    result = struct.Struct(f'<i{num_players}i')
+
+    def records():
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        offset = HEADER.size
+        while offset < len(data):
+            button, num_cards, num_actions = COUNTS.unpack_from(data, offset)
+            offset += COUNTS.size
+            starting_stacks = stacks.unpack_from(data, offset)
+            offset += stacks.size
+            cards = data[offset:offset + num_cards].tobytes()
+            offset += num_cards
+            actions = data[offset:offset + num_actions].tobytes()
+            offset += num_actions
+            reward, *final_stacks = result.unpack_from(data, offset)
+            offset += result.size
+            yield HandRecord(button, starting_stacks, cards, actions, reward, tuple(final_stacks))
+    return num_players, blinds, records()
+
+class ScriptedDeck:
+    """Deals a fixed card sequence, in the Deck interface PokerEnvironment uses."""
+    __slots__ = ('cards', 'cursor')
+
+    def __init__(self):
+        self.cards = []
+        self.cursor = 0
+
+    def shuffle(self):
+        self.cursor = 0
+
+    def deal(self, num):
+        dealt = self.cards[self.cursor:self.cursor + num]
+        self.cursor += num
+        return dealt
+
+    def deal_into(self, cards, num):
+        for _ in range(num):
+            cards.append(self.cards[self.cursor])
+            self.cursor += 1
+
+def replay_environment(num_players, blinds, observer=None):
+    """A PokerEnvironment dealing from a ScriptedDeck, for re-simulating logged hands."""
+    env = PokerEnvironment([Player(f'P{i}') for i in range(num_players)], blinds, observer)
+    env.deck = ScriptedDeck()
+    return env
+
+def start_hand(env, record):
+    """Resets a replay_environment to the logged hand's stacks, button and cards."""
+    for p, stack in zip(env.players, record.starting_stacks):
+        p.chips = stack
+    env.dealer_button_pos = (record.button - 1) % len(env.players) # reset() moves the button on
+    env.deck.cards = [CARDS[c] for c in record.cards]
+    env.reset()
+
+def replay(path):
+    """
+    Re-simulates every hand of a log through a PokerEnvironment with the logged stacks,
+    button, cards and actions. Returns (hands replayed, indices of hands whose reward,
+    final stacks or end point differ from the log).
+    """
+    num_players, blinds, records = read_hands(path)
+    env = replay_environment(num_players, blinds)
+    deck = env.deck
+
+    hands, mismatches = 0, []
+    for i, record in enumerate(records):
+        try:
+            start_hand(env, record)
+            done = False
+            for action in record.actions:
+                _, reward, done = env.step(action)
+            ok = (done and reward == record.reward and deck.cursor == len(deck.cards)
+                  and tuple(p.chips for p in env.players) == record.final_stacks)
+        except IndexError: # Replay asked for more cards than were logged
+            ok = False
+        if not ok:
+            mismatches.append(i)
+        hands += 1
+    return hands, mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a binary hand history.")
+    parser.add_argument('command', choices=['replay', 'show'])
+    parser.add_argument('path')
+    parser.add_argument('--limit', type=int, default=10, help="hands to print with `show`")
+    args = parser.parse_args()
+
+    if args.command == 'replay':
+        start = time.perf_counter()
+        hands, mismatches = replay(args.path)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({'hands': hands, 'mismatches': len(mismatches), 'first_mismatches': mismatches[:10],
+                          'hands_per_second': round(hands / max(elapsed, 1e-9))}))
+        raise SystemExit(1 if mismatches else 0)
+
+    num_players, blinds, records = read_hands(args.path)
+    print(f"{num_players} players, blinds {blinds[0]}/{blinds[1]}")
+    for i, record in enumerate(records):
+        if i >= args.limit:
+            break
+        cards = [repr(CARDS[c]) for c in record.cards]
+        print(f"#{i} button {record.button} stacks {list(record.starting_stacks)} cards {' '.join(cards)} "
+              f"actions {list(record.actions)} reward {record.reward:+d} -> {list(record.final_stacks)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import os
+from itertools import combinations
+import numpy as np
+
+# Cached tables live next to the package and are memory-mapped on load
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+LOW_INDEX_FILE = os.path.join(DATA_DIR, 'hand_ranks_low.npy')
+HIGH_INDEX_FILE = os.path.join(DATA_DIR, 'hand_ranks_high.npy')
+UNSUITED_VALUES_FILE = os.path.join(DATA_DIR, 'hand_ranks_unsuited.npy')
+FLUSH_VALUES_FILE = os.path.join(DATA_DIR, 'hand_ranks_flush.npy')
+PREFLOP_EQUITY_FILE = os.path.join(DATA_DIR, 'preflop_equity.npy')
+
+NUM_RANKS = 13
+WORST_HAND = 7462
+NO_FLUSH = np.iinfo(np.uint16).max  # Flush table entry for suits holding fewer than 5 cards
+
+# A rank multiset is keyed by its base-5 rank counts: sum of 5 ** rank over the cards.
+# Counts never exceed 4, so the key is unique for any 5-7 card hand. The key splits
+# into its low digits (ranks 2-8) and high digits (ranks 9-A), each mapped to a dense
+# index into a 2-D score table, so lookups stay direct without a ~1e9 entry table.
+RANK_KEY = [5 ** r for r in range(NUM_RANKS)]
+LOW_BASE = 5 ** 7
+
+# Straights as (top rank, ranks), best first. The wheel (5-high) uses the ace low.
+STRAIGHTS = [(top, [top - i for i in range(5)]) for top in range(12, 3, -1)] + [(3, [3, 2, 1, 0, 12])]
+
+def _hand_classes():
+    """
+    Enumerates the 7462 distinct 5-card hand classes from best (1) to worst (7462),
+    in the same order as the treys/Cactus Kev evaluator. Returns one dict per category
+    mapping the class description to its score.
+    """
+    desc = list(range(12, -1, -1))
+    straight_sets = {frozenset(ranks) for _, ranks in STRAIGHTS}
+    # Five distinct ranks that don't make a straight, best first
+    unpaired = [c for c in combinations(desc, 5) if frozenset(c) not in straight_sets]
+
+    score = 1
+    classes = {}
+    def add(category, keys):
+        nonlocal score
+        classes[category] = {}
+        for key in keys:
+            classes[category][key] = score
+            score += 1
+
+    add('straight_flush', [top for top, _ in STRAIGHTS])
+    add('quads', [(q, k) for q in desc for k in desc if k != q])
+    add('full_house', [(t, p) for t in desc for p in desc if p != t])
+    add('flush', unpaired)
+    add('straight', [top for top, _ in STRAIGHTS])
+    add('trips', [(t, *k) for t in desc for k in combinations([r for r in desc if r != t], 2)])
+    add('two_pair', [(p1, p2, k) for p1, p2 in combinations(desc, 2) for k in desc if k not in (p1, p2)])
+    add('pair', [(p, *k) for p in desc for k in combinations([r for r in desc if r != p], 3)])
+    add('high_card', unpaired)
+    assert score - 1 == WORST_HAND
+    return classes
+
+def _find_straight(present):
+    for top, ranks in STRAIGHTS:
+        if all(present[r] for r in ranks):
+            return top
+    return None
+
+def _best_unsuited(counts, classes):
+    """Best 5-card score for a rank multiset, ignoring flushes."""
+    ranks = [r for r in range(12, -1, -1) if counts[r]]
+    quads = [r for r in ranks if counts[r] >= 4]
+    trips = [r for r in ranks if counts[r] >= 3]
+    pairs = [r for r in ranks if counts[r] >= 2]
+
+    if quads:
+        q = quads[0]
+        return classes['quads'][(q, next(r for r in ranks if r != q))]
+    if trips and len(pairs) >= 2:
+        t = trips[0]
+        return classes['full_house'][(t, next(r for r in pairs if r != t))]
+    top = _find_straight(counts)
+    if top is not None:
+        return classes['straight'][top]
+    if trips:
+        t = trips[0]
+        return classes['trips'][(t, *[r for r in ranks if r != t][:2])]
+    if len(pairs) >= 2:
+        p1, p2 = pairs[:2]
+        return classes['two_pair'][(p1, p2, next(r for r in ranks if r not in (p1, p2)))]
+    if pairs:
+        p = pairs[0]
+        return classes['pair'][(p, *[r for r in ranks if r != p][:3])]
+    return classes['high_card'][tuple(ranks[:5])]
+
+def _rank_multisets(size, max_rank=NUM_RANKS - 1, max_count=4):
+    """Yields every rank-count vector with `size` cards and at most 4 of a rank."""
+    if max_rank < 0:
+        if size == 0:
+            yield [0] * NUM_RANKS
+        return
+    for n in range(min(size, max_count) + 1):
+        for counts in _rank_multisets(size - n, max_rank - 1):
+            counts[max_rank] = n
+            yield counts
+
+def build_rank_tables():
+    """
+    Builds the evaluator lookup tables:
+    - low/high: dense index of the low and high base-5 digits of a rank key (-1 if unused).
+    - unsuited: best non-flush score of every 5, 6 and 7 card rank multiset,
+      at [low[key % LOW_BASE], high[key // LOW_BASE]].
+    - flush: best flush / straight flush score for each 13-bit mask of suited ranks.
+    """
+    classes = _hand_classes()
+
+    keys, values = [], []
+    for size in (5, 6, 7):
+        for counts in _rank_multisets(size):
+            keys.append(sum(n * RANK_KEY[r] for r, n in enumerate(counts)))
+            values.append(_best_unsuited(counts, classes))
+    keys = np.array(keys, dtype=np.int64)
+
+    low_digits, low_ids = np.unique(keys % LOW_BASE, return_inverse=True)
+    high_digits, high_ids = np.unique(keys // LOW_BASE, return_inverse=True)
+    low = np.full(LOW_BASE, -1, dtype=np.int32)
+    low[low_digits] = np.arange(len(low_digits))
+    high = np.full(5 ** (NUM_RANKS - 7), -1, dtype=np.int32)
+    high[high_digits] = np.arange(len(high_digits))
+    unsuited = np.zeros((len(low_digits), len(high_digits)), dtype=np.uint16)
+    unsuited[low_ids, high_ids] = values
+
+    flush = np.full(1 << NUM_RANKS, NO_FLUSH, dtype=np.uint16)
+    for mask in range(1 << NUM_RANKS):
+        present = [(mask >> r) & 1 for r in range(NUM_RANKS)]
+        if sum(present) < 5:
+            continue
+        top = _find_straight(present)
+        if top is not None:
+            flush[mask] = classes['straight_flush'][top]
+        else:
+            ranks = [r for r in range(12, -1, -1) if present[r]]
+            flush[mask] = classes['flush'][tuple(ranks[:5])]
+    return low, high, unsuited, flush
+
+def load_rank_tables():
+    """
+    Loads the evaluator tables memory-mapped from the .npy cache, building and
+    caching them on first use.
+    """
+    files = (LOW_INDEX_FILE, HIGH_INDEX_FILE, UNSUITED_VALUES_FILE, FLUSH_VALUES_FILE)
+    if not all(os.path.exists(f) for f in files):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        for path, table in zip(files, build_rank_tables()):
+            # Write then rename, so a concurrent reader never sees a partial file
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, table)
+            os.replace(tmp, path)
+    # Plain ndarray views of the mappings, without np.memmap's per-index overhead
+    return tuple(np.asarray(np.load(f, mmap_mode='r')) for f in files)
+
+def load_preflop_equity():
+    """
+    Loads the 13x13 pre-flop equity table written by `python -m game.preflop_equity`,
+    or None if it hasn't been built.
+    """
+    if not os.path.exists(PREFLOP_EQUITY_FILE):
+        return None
+    return np.load(PREFLOP_EQUITY_FILE)
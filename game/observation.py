@@ -0,0 +1,92 @@
+import numpy as np
+from .card import CARDS
+from .hand_evaluator import estimate_equity, evaluate_codes, evaluate_hands, get_preflop_equity, get_preflop_strength, preflop_equities
+from .lookup_tables import WORST_HAND
+
+# hand strength (1) + community ranks (5) + chips (1) + pot (1) + current bet (1)
+# + opponent chips (1) + opponent bet (1) + position (1) + betting round (1)
+OBSERVATION_DIM = 13
+
+class Observer:
+    """
+    Encodes the acting player's view of a hand into the network's float32 feature
+    vector, writing straight into a caller-supplied buffer when given one. Hand strength
+    is flipped so that lower is better throughout:
+    - pre-flop: 1 - Chen score (or 1 - equity from the precomputed table)
+    - post-flop: evaluator rank / 7462 (or 1 - estimate_equity against a random hand)
+    Stacks, bets and the pot are normalized by `starting_chips`.
+    """
+    def __init__(self, starting_chips=1000, preflop_equity=False, postflop_equity=False, equity_samples=500):
+        self.starting_chips = starting_chips
+        self.preflop_equity = preflop_equity
+        self.postflop_equity = postflop_equity
+        self.equity_samples = equity_samples
+
+    def config(self):
+        """The settings that determine the encoding, for checking stored transitions and checkpoints against."""
+        return {'starting_chips': self.starting_chips, 'preflop_equity': self.preflop_equity,
+                'postflop_equity': self.postflop_equity, 'equity_samples': self.equity_samples}
+
+    def hand_strength(self, hand, community):
+        """Hand strength for Card objects; environments cache it per seat and street."""
+        if not community:
+            if self.preflop_equity:
+                return 1.0 - get_preflop_equity(hand)
+            return 1.0 - get_preflop_strength(hand)
+        if self.postflop_equity:
+            return 1.0 - estimate_equity(hand, community, self.equity_samples)
+        return evaluate_codes([c.code for c in hand], [c.code for c in community]) / WORST_HAND
+
+    def hand_strengths(self, hands, community):
+        """Batched hand_strength for (N, 2) hands and (N, 5) boards of card codes, -1 = undealt."""
+        strengths = np.empty(len(hands), dtype=np.float32)
+        num_dealt = (community >= 0).sum(axis=1)
+        preflop = num_dealt == 0
+        if self.preflop_equity:
+            strengths[preflop] = 1.0 - preflop_equities(hands[preflop])
+        else:
+            for i in np.flatnonzero(preflop):
+                strengths[i] = 1.0 - get_preflop_strength([CARDS[c] for c in hands[i]])
+        if self.postflop_equity:
+            for i in np.flatnonzero(~preflop):
+                strengths[i] = 1.0 - estimate_equity(hands[i], community[i, :num_dealt[i]], self.equity_samples)
+        else:
+            for n in (3, 4, 5):
+                rows = num_dealt == n
+                strengths[rows] = evaluate_hands(hands[rows], community[rows, :n]) / WORST_HAND
+        return strengths
+
+    def encode(self, state, strength, out=None):
+        """Writes the observation of a PokerEnvironment state dict into `out` (allocated if None)."""
+        if out is None:
+            out = np.empty(OBSERVATION_DIM, dtype=np.float32)
+        chips = self.starting_chips
+        out[0] = strength
+        community = state['community']
+        for i in range(5):
+            out[1 + i] = (community[i].code % 13) / 12.0 if i < len(community) else -1.0
+        out[6] = state['chips'] / chips
+        out[7] = state['pot'] / (chips * 2)
+        out[8] = state['current_bet'] / chips
+        out[9] = state['opponent_chips'] / chips
+        out[10] = state['opponent_bet'] / chips
+        out[11] = state['position']
+        out[12] = state['betting_round'] / 4.0 # Normalize betting round
+        return out
+
+    def encode_batch(self, states, strengths, out=None):
+        """Batched encode for the stacked states of a BatchPokerEnvironment: (N, OBSERVATION_DIM)."""
+        community = states['community']
+        if out is None:
+            out = np.empty((len(community), OBSERVATION_DIM), dtype=np.float32)
+        chips = self.starting_chips
+        out[:, 0] = strengths
+        out[:, 1:6] = np.where(community >= 0, (community % 13) / 12.0, -1)
+        out[:, 6] = states['chips'] / chips
+        out[:, 7] = states['pot'] / (chips * 2)
+        out[:, 8] = states['current_bet'] / chips
+        out[:, 9] = states['opponent_chips'] / chips
+        out[:, 10] = states['opponent_bet'] / chips
+        out[:, 11] = states['position']
+        out[:, 12] = states['betting_round'] / 4.0
+        return out
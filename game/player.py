@@ -1,4 +1,6 @@
 class Player:
+    __slots__ = ('name', 'chips', 'starting_chips', 'hand', 'current_bet', 'folded', 'is_all_in')
+
     def __init__(self, name, chips=1000):
         self.name = name
         self.chips = chips
@@ -9,8 +11,8 @@ class Player:
         self.is_all_in = False
 
     def reset_hand(self):
-        """Resets player's state for a new hand."""
-        self.hand = []
+        """Resets player's state for a new hand, reusing the hand list."""
+        self.hand.clear()
         self.current_bet = 0
         self.folded = False
         self.is_all_in = False
@@ -0,0 +1,59 @@
+"""
+Build step for the pre-flop equity table: heads-up all-in equity of each of the 169
+canonical starting hands against a uniformly random hand, estimated by Monte Carlo
+from a seeded generator so the table is reproducible.
+
+    python -m game.preflop_equity --trials 50000 --seed 0
+"""
+import argparse
+import os
+import numpy as np
+from .hand_evaluator import evaluate_hands
+from .lookup_tables import DATA_DIR, PREFLOP_EQUITY_FILE
+
+def canonical_hands():
+    """
+    Yields (row, col, card1, card2) for the 169 starting hands, with a representative
+    pair of card codes. Pairs sit on the diagonal, suited hands at [high, low] and
+    offsuit hands at [low, high].
+    """
+    for hi in range(13):
+        for lo in range(hi + 1):
+            if hi == lo:
+                yield hi, lo, hi, 13 + lo        # Pair: Hearts + Diamonds
+            else:
+                yield hi, lo, hi, lo             # Suited: both Hearts
+                yield lo, hi, hi, 13 + lo        # Offsuit: Hearts + Diamonds
+
+def hand_equity(card1, card2, trials, rng):
+    """Monte Carlo equity (win + half of ties) of one hand against a random hand."""
+    remaining = np.setdiff1d(np.arange(52), [card1, card2])
+    # Opponent hole cards and board from a random permutation of the remaining 50 cards
+    dealt = rng.permuted(np.tile(remaining, (trials, 1)), axis=1)[:, :7]
+    hero = np.tile([card1, card2], (trials, 1))
+    board = dealt[:, 2:]
+    hero_score = evaluate_hands(hero, board)
+    villain_score = evaluate_hands(dealt[:, :2], board)
+    return ((hero_score < villain_score).sum() + 0.5 * (hero_score == villain_score).sum()) / trials
+
+def build_preflop_equity(trials=50000, seed=0):
+    """Returns the 13x13 float32 equity table."""
+    rng = np.random.default_rng(seed)
+    table = np.zeros((13, 13), dtype=np.float32)
+    for row, col, card1, card2 in canonical_hands():
+        table[row, col] = hand_equity(card1, card2, trials, rng)
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the pre-flop equity table.")
+    parser.add_argument('--trials', type=int, default=50000, help="Monte Carlo deals per starting hand")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    table = build_preflop_equity(args.trials, args.seed)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    np.save(PREFLOP_EQUITY_FILE, table)
+    print(f"Wrote {PREFLOP_EQUITY_FILE} (AA: {table[12, 12]:.3f}, 72o: {table[0, 5]:.3f})")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 class Table:
+    __slots__ = ('players', 'community_cards', 'pot')
+
     def __init__(self, players):
         self.players = players
         self.community_cards = []
         self.pot = 0
     def reset(self):
-        self.community_cards = []
+        """Clears the board and pot and resets every player for a new hand, in place."""
+        self.community_cards.clear()
         self.pot = 0
         for p in self.players:
-            p.reset()
+            p.reset_hand()
@@ -1,5 +1,17 @@
+import argparse
+from config.config import CHECKPOINT_PATH, LEAGUE, NUM_WORKERS, RESUME
 from training.train import train
+from training.distributed import train_distributed
+from training.league import train_league
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the poker bot.")
+    parser.add_argument('--resume', action='store_true', default=RESUME, help=f"continue from the latest checkpoint in {CHECKPOINT_PATH}")
+    args = parser.parse_args()
     print("Starting poker bot training...")
-    train()
\ No newline at end of file
+    if LEAGUE:
+        train_league()
+    elif NUM_WORKERS > 0:
+        train_distributed(NUM_WORKERS)
+    else:
+        train(args.resume)
\ No newline at end of file
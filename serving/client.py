@@ -0,0 +1,124 @@
+"""
+Client of the serving process (serving/server.py), and a load generator that plays
+many tables against it at once:
+
+    python -m serving.client bench --tables 64 --requests 20000
+    python -m serving.client stats
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import numpy as np
+from config.config import *
+from serving.server import ACT, ERROR, RESPONSE, STATS, STATS_HEADER, request_struct
+
+class PolicyClient:
+    """
+    One connection, on which any number of act() calls can be in flight at once;
+    answers are matched to them by request id.
+    """
+    def __init__(self, reader, writer, state_dim=STATE_DIM):
+        self.reader, self.writer = reader, writer
+        self.request = request_struct(state_dim)
+        self._ids = itertools.count()
+        self._waiting = {}
+        self._stats = [] # Futures of stats requests, answered in order
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    @classmethod
+    async def connect(cls, socket_path=SERVE_SOCKET, host='127.0.0.1', port=SERVE_PORT, state_dim=STATE_DIM):
+        if socket_path:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, state_dim)
+
+    async def act(self, state):
+        """The server's action for one observation vector; raises RuntimeError if the server couldn't answer it."""
+        request_id = next(self._ids) & 0xFFFFFFFF
+        future = self._waiting[request_id] = asyncio.get_running_loop().create_future()
+        self.writer.write(ACT + self.request.pack(request_id, *np.asarray(state, dtype=np.float32)))
+        return await future
+
+    async def stats(self):
+        future = asyncio.get_running_loop().create_future()
+        self._stats.append(future)
+        self.writer.write(STATS)
+        return await future
+
+    async def _read_loop(self):
+        try:
+            while True:
+                kind = await self.reader.readexactly(1)
+                if kind == ACT:
+                    _, request_id, action = RESPONSE.unpack(kind + await self.reader.readexactly(RESPONSE.size - 1))
+                    self._waiting.pop(request_id).set_result(action)
+                elif kind == ERROR:
+                    _, request_id, _ = RESPONSE.unpack(kind + await self.reader.readexactly(RESPONSE.size - 1))
+                    self._waiting.pop(request_id).set_exception(RuntimeError(f"Server failed request {request_id}"))
+                else:
+                    _, length = STATS_HEADER.unpack(kind + await self.reader.readexactly(STATS_HEADER.size - 1))
+                    self._stats.pop(0).set_result(json.loads(await self.reader.readexactly(length)))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            for future in [*self._waiting.values(), *self._stats]:
+                if not future.done():
+                    future.set_exception(ConnectionError(f"Server closed the connection ({e})"))
+
+    async def close(self):
+        self._reader_task.cancel()
+        self.writer.close()
+        await self.writer.wait_closed()
+
+async def bench(num_tables=64, num_requests=20000, connections=4, seed=0, **address):
+    """
+    `num_tables` concurrent tables, spread over `connections` connections, each
+    sending its next decision as soon as the last one is answered. Returns the
+    client-side throughput and latency percentiles, plus the server's stats.
+    """
+    clients = [await PolicyClient.connect(**address) for _ in range(connections)]
+    states = np.random.default_rng(seed).random((1024, STATE_DIM), dtype=np.float32)
+    latencies = []
+
+    async def table(i, n):
+        client = clients[i % connections]
+        for k in range(n):
+            start = time.perf_counter()
+            await client.act(states[(i * 7919 + k) % len(states)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(table(i, num_requests // num_tables) for i in range(num_tables)))
+    elapsed = time.perf_counter() - start
+    server_stats = await clients[0].stats()
+    for client in clients:
+        await client.close()
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    return {'tables': num_tables, 'requests': len(latencies), 'requests_per_sec': round(len(latencies) / elapsed),
+            'p50_ms': round(float(p50), 3), 'p99_ms': round(float(p99), 3), 'server': server_stats}
+
+async def fetch_stats(**address):
+    client = await PolicyClient.connect(**address)
+    stats = await client.stats()
+    await client.close()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Query or load-test the serving process.")
+    parser.add_argument('command', choices=('bench', 'stats'))
+    parser.add_argument('--socket', default=SERVE_SOCKET, help="Unix socket path (default: TCP on localhost)")
+    parser.add_argument('--port', type=int, default=SERVE_PORT)
+    parser.add_argument('--tables', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=4)
+    args = parser.parse_args()
+    address = {'socket_path': args.socket, 'port': args.port}
+    if args.command == 'bench':
+        result = asyncio.run(bench(args.tables, args.requests, args.connections, **address))
+    else:
+        result = asyncio.run(fetch_stats(**address))
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
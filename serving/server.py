@@ -0,0 +1,238 @@
+"""
+Serving process: answers decision requests for many concurrent tables from one
+process, over a Unix socket or TCP on localhost.
+
+Pending requests, up to SERVE_MAX_BATCH, are answered by one batched forward pass of
+the greedy policy: those that arrived while the previous batch ran, plus any within
+SERVE_BATCH_WINDOW_MS (the event loop's timers round a window up to about 1 ms, so
+the default of none gives the lowest latency unless clients send in bursts).
+The model file is polled every SERVE_RELOAD_INTERVAL seconds, and a new checkpoint
+is loaded off the event loop and swapped in between two batches, so no request is
+dropped or answered by a half-loaded model. Latency (p50/p99, from a request's
+arrival to its answer) and throughput counters are logged every
+SERVE_STATS_INTERVAL seconds and returned by a stats request.
+
+Wire format, little-endian, any number of requests in flight per connection:
+- act:   b'A', uint32 request id, STATE_DIM float32 observation
+         -> b'A', uint32 request id, int32 action
+         or b'E', uint32 request id, int32 0 if the observation isn't finite or the
+            policy failed on its batch
+- stats: b'S' -> b'S', uint32 length, JSON
+
+    python -m serving.server pokerbot_dqn.pth --socket /tmp/pokerbot.sock
+    python -m serving.client bench --socket /tmp/pokerbot.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+import numpy as np
+from agents.policy import load_policy
+from config.config import *
+
+ACT, ERROR, STATS = b'A', b'E', b'S'
+RESPONSE = struct.Struct('<cIi')
+STATS_HEADER = struct.Struct('<cI')
+LATENCY_WINDOW = 100000 # Most recent requests the latency percentiles cover
+
+def request_struct(state_dim):
+    """Payload of an act request after its type byte."""
+    return struct.Struct(f'<I{state_dim}f')
+
+class PolicyServer:
+    """The model, the pending requests and the counters; serves any number of connections."""
+    def __init__(self, model_path, window=SERVE_BATCH_WINDOW_MS / 1000, max_batch=SERVE_MAX_BATCH,
+                 reload_interval=SERVE_RELOAD_INTERVAL):
+        self.model_path = model_path
+        self.window = window
+        self.max_batch = max_batch
+        self.reload_interval = reload_interval
+        self.policy = load_policy(model_path)
+        self.version = 1
+        self._mtime = os.stat(model_path).st_mtime_ns
+        self.state_dim = getattr(self.policy, 'state_dim', STATE_DIM) # CFRAgent reads the standard observation
+        self.request = request_struct(self.state_dim)
+
+        self._pending = [] # (observation, future) in arrival order
+        self._has_work = asyncio.Event()
+        self._full = asyncio.Event()
+        self.latencies = np.zeros(LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.reloads = 0
+        self.started = time.perf_counter()
+
+    def submit(self, observation):
+        """A future resolved with the action for `observation` once its batch has run."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((observation, future))
+        self._has_work.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return future
+
+    async def batch_loop(self):
+        while True:
+            await self._has_work.wait()
+            if len(self._pending) < self.max_batch:
+                # Give concurrent tables the window to join this batch. Even without one, a
+                # pass of the event loop picks up requests already waiting on the sockets,
+                # and those arriving while a batch runs make up the next one.
+                if self.window > 0:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.window)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await asyncio.sleep(0)
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            if len(self._pending) < self.max_batch:
+                self._full.clear()
+            if not self._pending:
+                self._has_work.clear()
+
+            try:
+                actions = self.policy.select_actions(np.stack([observation for observation, _ in batch])).tolist()
+            except Exception as e: # Fails this batch only; the loop must outlive it or every later request would hang
+                print(f"[serve] Model v{self.version} failed on a batch of {len(batch)} ({e!r})")
+                self.errors += len(batch)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), action in zip(batch, actions):
+                if not future.done(): # Not abandoned by a closed connection
+                    future.set_result(action)
+            self.batches += 1
+
+    async def watch_model(self):
+        """Reloads the model whenever its file changes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                mtime = os.stat(self.model_path).st_mtime_ns
+            except FileNotFoundError: # Mid-replacement
+                continue
+            if mtime == self._mtime:
+                continue
+            try:
+                policy = await loop.run_in_executor(None, load_policy, self.model_path)
+            except Exception as e: # E.g. caught while the trainer was still writing it; retried at the next poll
+                print(f"[serve] Reloading {self.model_path} failed ({e}), keeping model v{self.version}")
+                continue
+            state_dim = getattr(policy, 'state_dim', STATE_DIM)
+            if state_dim != self.state_dim:
+                print(f"[serve] {self.model_path} has state_dim {state_dim}, expected {self.state_dim}; not reloaded")
+            else:
+                self.policy = policy # Takes effect from the next batch
+                self.version += 1
+                self.reloads += 1
+                print(f"[serve] Reloaded {self.model_path} as model v{self.version}")
+            self._mtime = mtime
+
+    def record(self, start):
+        self.latencies[self.requests % LATENCY_WINDOW] = time.perf_counter() - start
+        self.requests += 1
+
+    def stats(self):
+        latencies = self.latencies[:min(self.requests, LATENCY_WINDOW)]
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3 if len(latencies) else (0.0, 0.0)
+        return {'requests': self.requests, 'batches': self.batches,
+                'mean_batch': round(self.requests / max(self.batches, 1), 2),
+                'requests_per_sec': round(self.requests / (time.perf_counter() - self.started), 1),
+                'p50_ms': round(float(p50), 3), 'p99_ms': round(float(p99), 3),
+                'errors': self.errors, 'model_version': self.version, 'reloads': self.reloads, 'pending': len(self._pending)}
+
+    async def log_stats(self, interval):
+        last_requests, last_time = 0, time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            stats, now = self.stats(), time.perf_counter()
+            rate = (stats['requests'] - last_requests) / (now - last_time)
+            last_requests, last_time = stats['requests'], now
+            print(f"[serve] {rate:.0f} requests/s, batch {stats['mean_batch']}, p50 {stats['p50_ms']} ms, "
+                  f"p99 {stats['p99_ms']} ms, model v{stats['model_version']}")
+
+    async def handle(self, reader, writer):
+        """One client connection: reads requests as they come and answers each when its batch is done."""
+        request = self.request
+        try:
+            while True:
+                kind = await reader.readexactly(1)
+                if kind == ACT:
+                    payload = await reader.readexactly(request.size)
+                    start = time.perf_counter()
+                    request_id = int.from_bytes(payload[:4], 'little')
+                    observation = np.frombuffer(payload, dtype=np.float32, offset=4)
+                    if np.isfinite(observation).all():
+                        self.submit(observation).add_done_callback(
+                            lambda future, request_id=request_id, start=start: self._respond(writer, request_id, start, future))
+                    else: # Rejected before it can spoil a batch
+                        self.errors += 1
+                        writer.write(RESPONSE.pack(ERROR, request_id, 0))
+                elif kind == STATS:
+                    body = json.dumps(self.stats()).encode()
+                    writer.write(STATS_HEADER.pack(STATS, len(body)) + body)
+                else:
+                    print(f"[serve] Unknown request type {kind!r}, closing the connection")
+                    break
+                if writer.transport.get_write_buffer_size() > 1 << 20:
+                    await writer.drain() # Client not reading its answers: stop reading its requests
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # Client went away
+        finally:
+            writer.close()
+
+    def _respond(self, writer, request_id, start, future):
+        if future.cancelled() or writer.is_closing():
+            return
+        if future.exception() is not None:
+            writer.write(RESPONSE.pack(ERROR, request_id, 0))
+            return
+        writer.write(RESPONSE.pack(ACT, request_id, future.result()))
+        self.record(start)
+
+async def serve(model_path, socket_path=SERVE_SOCKET, host='127.0.0.1', port=SERVE_PORT, window=SERVE_BATCH_WINDOW_MS / 1000,
+                max_batch=SERVE_MAX_BATCH, reload_interval=SERVE_RELOAD_INTERVAL, stats_interval=SERVE_STATS_INTERVAL):
+    policy_server = PolicyServer(model_path, window, max_batch, reload_interval)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path) # Left behind by an earlier server
+        server = await asyncio.start_unix_server(policy_server.handle, path=socket_path)
+        address = socket_path
+    else:
+        server = await asyncio.start_server(policy_server.handle, host, port)
+        address = f"{host}:{port}"
+    print(f"[serve] {model_path} on {address}, batch window {window * 1e3:g} ms, max batch {max_batch}")
+    tasks = [asyncio.create_task(policy_server.batch_loop()), asyncio.create_task(policy_server.watch_model())]
+    if stats_interval:
+        tasks.append(asyncio.create_task(policy_server.log_stats(stats_interval)))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the trained policy to many tables at once.")
+    parser.add_argument('model', nargs='?', default='pokerbot_dqn.pth', help="DQN checkpoint or exported policy, hot-reloaded on change")
+    parser.add_argument('--socket', default=SERVE_SOCKET, help="Unix socket path (default: TCP on localhost)")
+    parser.add_argument('--port', type=int, default=SERVE_PORT)
+    parser.add_argument('--window-ms', type=float, default=SERVE_BATCH_WINDOW_MS, help="how long a batch waits for more requests")
+    parser.add_argument('--max-batch', type=int, default=SERVE_MAX_BATCH)
+    parser.add_argument('--reload-interval', type=float, default=SERVE_RELOAD_INTERVAL)
+    parser.add_argument('--stats-interval', type=float, default=SERVE_STATS_INTERVAL, help="seconds between stats lines (0 = off)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.model, args.socket, port=args.port, window=args.window_ms / 1000, max_batch=args.max_batch,
+                          reload_interval=args.reload_interval, stats_interval=args.stats_interval))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
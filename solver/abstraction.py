@@ -0,0 +1,64 @@
+"""
+Card and betting abstraction shared by the MCCFR solver and CFRAgent. An infoset is
+(street, hand-strength bucket, pot size, amount to call relative to the pot, stack
+to pot ratio, raises so far on the street). Each of these can be read off a
+PokerEnvironment state, or off its observation vector, so the agent can play from the same features the DQN sees.
+Infosets are hashed into a fixed number of table rows.
+"""
+from game.environment import get_raise_amount
+
+NUM_ACTIONS = 6
+POT_BUCKETS = 8 # log2 of the pot in big blinds, capped
+TO_CALL_EDGES = (0.25, 0.5, 1.0) # Fractions of the pot
+SPR_EDGES = (0.5, 1.0, 2.0, 4.0, 8.0)
+MAX_RAISES = 2 # Raises per street street_raises can tell apart
+_M64 = (1 << 64) - 1
+
+def strength_bucket(strength, num_buckets):
+    """Bucket of an Observer hand strength (lower is better), 0 = weakest. Pass the float32 value the observation holds."""
+    return min(int((1.0 - strength) * num_buckets), num_buckets - 1)
+
+def street_raises(street, bet, opp_bet, big_blind):
+    """
+    Raises so far on the street, up to MAX_RAISES, read off the bets at a decision.
+    Heads-up a call closes the betting, so a player still to act has raised at most
+    once since the opponent last did: each side has raised if its bet is above the
+    big blind pre-flop, or above nothing after.
+    """
+    forced = big_blind if street == 0 else 0
+    return (bet > forced) + (opp_bet > forced)
+
+def infoset_key(street, bucket, pot, to_call, stack, opp_stack, big_blind, raises):
+    """Packs the abstract infoset into one integer; `raises` is capped at the solver's max_raises."""
+    pot_bucket = min(max((pot // big_blind).bit_length() - 1, 0), POT_BUCKETS - 1)
+    if to_call <= 0:
+        call_bucket = 0
+    else:
+        call_bucket = 1 + sum(to_call > edge * pot for edge in TO_CALL_EDGES)
+    spr_bucket = sum(min(stack, opp_stack) >= edge * pot for edge in SPR_EDGES)
+    return ((((street * 64 + bucket) * POT_BUCKETS + pot_bucket) * 5 + call_bucket) * 6 + spr_bucket) * (MAX_RAISES + 1) + raises
+
+def infoset_index(key, table_bits):
+    """Row of `key` in a table of 2**table_bits rows (SplitMix64 hash)."""
+    x = (key + 0x9E3779B97F4A7C15) & _M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _M64
+    return (x ^ (x >> 31)) & ((1 << table_bits) - 1)
+
+def legal_actions(pot, stack, bet, opp_stack, opp_bet, raises_left=1):
+    """
+    The abstract game's actions at a decision: call/check always, fold only when facing
+    a bet, and the raises that put in distinct amounts larger than a call (none once
+    `raises_left` is 0 or the opponent is all-in). Amounts follow PokerEnvironment.step.
+    """
+    to_call = opp_bet - bet
+    actions = [0, 1] if to_call > 0 else [1]
+    if raises_left > 0 and opp_stack > 0 and stack > to_call:
+        min_raise = to_call + opp_bet
+        paid = set()
+        for action in (2, 3, 4, 5):
+            total = min(max(0, to_call + get_raise_amount(action, min_raise, pot, stack)), stack)
+            if total > max(to_call, 0) and total not in paid:
+                paid.add(total)
+                actions.append(action)
+    return actions
@@ -0,0 +1,173 @@
+"""
+Exploitability of a trained policy: the value of a best response to it in the
+abstracted heads-up game, in milli-big-blinds per hand.
+
+The betting tree (solver/betting.py) is the same for every deal, so it is walked once
+for a fixed batch of 2 * BR_DEALS seeded deals at a time, with NumPy arrays over the
+deals still reaching each node:
+- at the policy's decisions, one batched query gives its action for every deal
+  (greedy DQN policies) or its action probabilities (CFRAgent)
+- at the responder's decisions, every abstract action (solver/abstraction.py, raises
+  capped at CFR_MAX_RAISES per street) is expanded, and the responder picks, for each
+  of its BR_BUCKETS hand-strength buckets, the action with the highest
+  reach-weighted value over the first BR_DEALS deals (the fit set) in that bucket
+- showdowns are looked up from hand-evaluator scores computed once per deal
+
+The responder is scored on the other BR_DEALS deals only. Scoring it on the deals its
+choices were fit to would reward it for fitting their particular cards, which
+inflates the value at small sample sizes. Held out, the result estimates the value
+of one fixed strategy that only knows its own bucket and the betting, so up to
+sampling noise it is a lower bound on the exploitability in the full game. It is
+deterministic for a policy and seed, which makes it one comparable strength number
+per checkpoint:
+
+    python -m solver.best_response pokerbot_dqn.pth pokerbot_policy.npz cfr_tables
+"""
+import argparse
+import json
+import time
+import numpy as np
+from game.hand_evaluator import evaluate_hands
+from game.observation import OBSERVATION_DIM, Observer
+from config.config import *
+from solver.abstraction import NUM_ACTIONS, legal_actions
+from solver.betting import SHOWDOWN, apply_action, initial_state, is_forced
+from solver.mccfr import BOARD_SIZES, _make_observer
+
+class BestResponse:
+    """
+    Best response to `policy`, fit on `num_deals` seeded deals and scored on as many
+    others. The policy plays seat 0 of PokerEnvironment, as in the evaluation harness,
+    so it sees position 0 and wins tied showdowns; its blind alternates between the
+    two walks of `exploitability`.
+    """
+    def __init__(self, policy, observer, num_deals=BR_DEALS, num_buckets=BR_BUCKETS, max_raises=CFR_MAX_RAISES,
+                 starting_chips=STARTING_CHIPS, blinds=(10, 20), seed=BR_SEED):
+        self.policy = policy
+        self.num_buckets = num_buckets
+        self.max_raises = max_raises
+        self.starting_chips = starting_chips
+        self.blinds = blinds
+
+        # Deal i gives the policy cards[i, 0:2], the responder cards[i, 2:4] and the board cards[i, 4:];
+        # the responder's choices are fit on the first num_deals deals and scored on the rest
+        cards = np.random.default_rng(seed).random((2 * num_deals, 52)).argsort(axis=1)[:, :9]
+        self.fit = np.arange(2 * num_deals) < num_deals
+        hands, board = (cards[:, 0:2], cards[:, 2:4]), cards[:, 4:]
+        self.strengths = np.empty((4, 2 * num_deals), dtype=np.float32) # The policy's, by street
+        self.ranks = np.empty((4, 2 * num_deals, 5), dtype=np.float32) # Community features of the observation
+        self.buckets = np.empty((4, 2 * num_deals), dtype=np.intp) # The responder's
+        for street, n in enumerate(BOARD_SIZES):
+            community = np.where(np.arange(5) < n, board, -1)
+            self.strengths[street] = observer.hand_strengths(hands[0], community)
+            self.ranks[street] = np.where(community >= 0, (community % 13) / 12.0, -1)
+            strength = observer.hand_strengths(hands[1], community).astype(np.float64)
+            self.buckets[street] = np.minimum(((1.0 - strength) * num_buckets).astype(np.intp), num_buckets - 1)
+        # PokerEnvironment gives ties to seat 0, the policy's
+        self.responder_wins = evaluate_hands(hands[1], board) < evaluate_hands(hands[0], board)
+        self.observations = np.empty((2 * num_deals, OBSERVATION_DIM), dtype=np.float32)
+
+    def value(self, policy_seat):
+        """The responder's expected winnings per held-out hand, in chips, when the policy sits in `policy_seat` (0 = small blind)."""
+        self.policy_seat = policy_seat
+        self.nodes = 0
+        deals = np.arange(len(self.strengths[0]))
+        root = initial_state((self.starting_chips, self.starting_chips), self.blinds)
+        return float(self._value(root, deals, np.ones(len(deals)))[~self.fit].mean())
+
+    def _value(self, state, deals, reach):
+        """The responder's winnings on each of `deals`, which reach `state` with the policy's probabilities `reach`."""
+        self.nodes += 1
+        if is_forced(state):
+            return self._act(state, 1, deals, reach)
+
+        if state.player == self.policy_seat:
+            probabilities = self._policy_probabilities(state, deals)
+            values = np.zeros(len(deals))
+            for action in np.flatnonzero(probabilities.any(axis=0)):
+                rows = probabilities[:, action] > 0
+                p = probabilities[rows, action]
+                values[rows] += p * self._act(state, action, deals[rows], reach[rows] * p)
+            return values
+
+        street, player, stacks, bets, pot = state[:5]
+        opponent = 1 - player
+        actions = legal_actions(pot, stacks[player], bets[player], stacks[opponent], bets[opponent], self.max_raises - state.raises)
+        values = np.stack([self._act(state, a, deals, reach) for a in actions])
+        # One choice per bucket, fit on the fit deals: the responder can't tell the deals within a bucket apart.
+        # Buckets no fit deal reaches here take the best choice over all of them.
+        buckets = self.buckets[street, deals]
+        weights = reach * self.fit[deals]
+        totals = np.stack([np.bincount(buckets, weights=weights * v, minlength=self.num_buckets) for v in values])
+        unseen = np.bincount(buckets, weights=weights, minlength=self.num_buckets) == 0
+        totals[:, unseen] = totals.sum(axis=1, keepdims=True)
+        return values[totals.argmax(axis=0)[buckets], np.arange(len(deals))]
+
+    def _act(self, state, action, deals, reach):
+        state, outcome = apply_action(state, action)
+        if outcome is None:
+            return self._value(state, deals, reach)
+        responder = 1 - self.policy_seat
+        stack = state.stacks[responder] - self.starting_chips
+        if outcome == SHOWDOWN:
+            return stack + state.pot * self.responder_wins[deals]
+        return np.full(len(deals), stack + state.pot * (outcome == responder), dtype=np.float64)
+
+    def _policy_probabilities(self, state, deals):
+        """The policy's action probabilities at `state` for each deal, from one batch of observations."""
+        street, seat = state.street, self.policy_seat
+        chips = self.starting_chips
+        obs = self.observations[:len(deals)]
+        obs[:, 0] = self.strengths[street, deals]
+        obs[:, 1:6] = self.ranks[street, deals]
+        obs[:, 6] = state.stacks[seat] / chips
+        obs[:, 7] = state.pot / (chips * 2)
+        obs[:, 8] = state.bets[seat] / chips
+        obs[:, 9] = state.stacks[1 - seat] / chips
+        obs[:, 10] = state.bets[1 - seat] / chips
+        obs[:, 11] = 0 # Seat index
+        obs[:, 12] = street / 4.0
+        if hasattr(self.policy, 'action_probabilities_batch'):
+            return self.policy.action_probabilities_batch(obs)
+        probabilities = np.zeros((len(deals), NUM_ACTIONS))
+        probabilities[np.arange(len(deals)), self.policy.select_actions(obs)] = 1.0
+        return probabilities
+
+def exploitability(policy, num_deals=BR_DEALS, num_buckets=BR_BUCKETS, seed=BR_SEED, observer=None):
+    """
+    Best-response value against `policy` (a greedy policy, DQNAgent or CFRAgent),
+    averaged over both blinds. Returns a dict with the exploitability and the
+    responder's winnings per seat in mbb/hand, and the tree nodes walked.
+    """
+    from agents.policy import as_policy
+    policy = as_policy(policy)
+    if observer is None:
+        # A CFRAgent decodes observations with the observer its solver ran with
+        meta = getattr(policy, 'meta', None)
+        observer = _make_observer(meta) if meta else Observer(STARTING_CHIPS, USE_PREFLOP_EQUITY, USE_POSTFLOP_EQUITY, EQUITY_SAMPLES)
+    start = time.perf_counter()
+    response = BestResponse(policy, observer, num_deals, num_buckets, starting_chips=observer.starting_chips, seed=seed)
+    big_blind = response.blinds[1]
+    values, nodes = [], 0
+    for policy_seat in (0, 1):
+        values.append(response.value(policy_seat) / big_blind * 1000)
+        nodes += response.nodes
+    return {'exploitability_mbb': round(sum(values) / 2, 1), 'vs_small_blind_mbb': round(values[0], 1),
+            'vs_big_blind_mbb': round(values[1], 1), 'deals': num_deals, 'nodes': nodes,
+            'seconds': round(time.perf_counter() - start, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Exploitability of trained policies, in mbb/hand.")
+    parser.add_argument('paths', nargs='+', help="DQN state dicts, exported policies or MCCFR checkpoint directories")
+    parser.add_argument('--deals', type=int, default=BR_DEALS, help="deals the best response is fit on (and as many it is scored on)")
+    parser.add_argument('--buckets', type=int, default=BR_BUCKETS, help="hand-strength buckets the best response distinguishes")
+    parser.add_argument('--seed', type=int, default=BR_SEED)
+    args = parser.parse_args()
+
+    from agents.policy import load_policy
+    for path in args.paths:
+        result = exploitability(load_policy(path), args.deals, args.buckets, args.seed)
+        print(json.dumps({'path': path, **result}))
+
+if __name__ == "__main__":
+    main()
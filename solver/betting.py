@@ -0,0 +1,60 @@
+"""
+Public betting state of a heads-up PokerEnvironment hand and its transitions, as
+immutable tuples for tree walks. Seat 0 is the small blind, who acts first on every
+street under PokerEnvironment's heads-up rules; seat 1 is the big blind. Stacks,
+bets and the pot depend only on the actions, never on the cards.
+"""
+from collections import namedtuple
+from game.environment import get_raise_amount
+
+SHOWDOWN = -1
+
+BettingState = namedtuple('BettingState', ['street', 'player', 'stacks', 'bets', 'pot', 'last_raiser', 'raises'])
+
+def initial_state(stacks, blinds):
+    """State after the blinds are posted, with the small blind (seat 0) to act."""
+    sb, bb = min(blinds[0], stacks[0]), min(blinds[1], stacks[1])
+    return BettingState(0, 0, (stacks[0] - sb, stacks[1] - bb), (sb, bb), sb + bb, 1, 0)
+
+def is_forced(state):
+    """An all-in player can only check: PokerEnvironment turns any action into a call."""
+    return state.stacks[state.player] == 0
+
+def apply_action(state, action):
+    """
+    Applies `action` as PokerEnvironment.step does. Returns (next state, outcome):
+    outcome is None while the hand goes on, SHOWDOWN once the river betting closes,
+    or the seat that wins the pot because the other folded.
+    """
+    street, player, stacks, bets, pot, last_raiser, raises = state
+    opponent = 1 - player
+    if action == 0: # Fold
+        return state, opponent
+
+    if action == 2 and bets[opponent] == 0: # A min-raise of nothing is a check
+        action = 1
+    to_call = bets[opponent] - bets[player]
+    round_over = False
+    if action == 1: # Call/check
+        paid = min(max(0, to_call), stacks[player])
+        # A call ends the round, and so does a check after the flop
+        round_over = to_call > 0 or street > 0
+    else: # Raise
+        amount = to_call + get_raise_amount(action, to_call + bets[opponent], pot, stacks[player])
+        paid = min(max(0, amount), stacks[player])
+        last_raiser = player
+        raises += 1
+    if player == 0:
+        stacks, bets = (stacks[0] - paid, stacks[1]), (bets[0] + paid, bets[1])
+    else:
+        stacks, bets = (stacks[0], stacks[1] - paid), (bets[0], bets[1] + paid)
+    pot += paid
+
+    if not round_over:
+        player = opponent
+        round_over = player == last_raiser
+    if not round_over:
+        return BettingState(street, player, stacks, bets, pot, last_raiser, raises), None
+    if street == 3:
+        return BettingState(street, player, stacks, bets, pot, last_raiser, raises), SHOWDOWN
+    return BettingState(street + 1, 0, stacks, (0, 0), pot, -1, 0), None
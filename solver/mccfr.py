@@ -0,0 +1,260 @@
+"""
+External-sampling Monte Carlo CFR for heads-up play under PokerEnvironment's betting
+rules and its six abstract actions, on the abstraction in solver/abstraction.py.
+
+Each iteration deals one random hand (and stack split) and walks the game tree once
+per player: the traversing player's actions are all explored and their regrets
+updated, the opponent's single sampled action adds its current strategy to the
+average. Regrets and strategy sums live in two float32 arrays of shape
+(2**CFR_TABLE_BITS, 6) indexed by the hashed infoset. With several workers the
+arrays sit in shared memory and every process updates them in place, without locks,
+since concurrent updates to the same rows are rare.
+
+The tables are checkpointed to CFR_PATH every CFR_CHECKPOINT_INTERVAL iterations and
+a later run resumes from them. CFRAgent (agents/cfr_agent.py) plays the average strategy.
+
+    python -m solver.mccfr --iterations 100000 --workers 4
+    python evaluate_bot.py --policy cfr_tables
+"""
+import argparse
+import json
+import os
+import random
+import time
+import numpy as np
+import multiprocessing as mp
+from game.card import CARDS
+from game.hand_evaluator import evaluate_codes
+from game.observation import Observer
+from config.config import *
+from solver.abstraction import MAX_RAISES, NUM_ACTIONS, infoset_index, infoset_key, legal_actions, strength_bucket
+from solver.betting import SHOWDOWN, apply_action, initial_state, is_forced
+
+BOARD_SIZES = (0, 3, 4, 5)
+ITERATION_CHUNK = 100 # Iterations a worker claims at a time
+
+class ExternalSamplingMCCFR:
+    """
+    One process's view of the solver: runs iterations against the (possibly shared)
+    `regrets` and `strategy` tables. Seats are as in solver/betting.py: 0 is the small
+    blind, 1 the big blind.
+    """
+    def __init__(self, regrets, strategy, observer, num_buckets=CFR_BUCKETS, max_raises=CFR_MAX_RAISES,
+                 starting_chips=STARTING_CHIPS, blinds=(10, 20), seed=None):
+        if max_raises > MAX_RAISES:
+            raise ValueError(f"max_raises is at most {MAX_RAISES}: CFRAgent reads the raise count off the bets")
+        self.regrets = regrets
+        self.strategy = strategy
+        self.table_bits = int(np.log2(len(regrets)))
+        self.observer = observer
+        self.num_buckets = num_buckets
+        self.max_raises = max_raises
+        self.starting_chips = starting_chips
+        self.small_blind, self.big_blind = blinds
+        self.rng = random.Random(seed)
+
+    def iterate(self):
+        """Deals a hand and traverses it once for each player."""
+        cards = self.rng.sample(range(52), 9)
+        self.hands = (cards[0:2], cards[2:4])
+        self.board = cards[4:]
+        self.buckets = [[None] * 4, [None] * 4]
+        self.ranks = None
+        # Even stacks half of the time (fresh or duplicate hands), else a random split of the chips in play
+        total = 2 * self.starting_chips
+        sb_stack = self.starting_chips if self.rng.random() < 0.5 else self.rng.randint(self.big_blind, total - self.big_blind)
+        self.start = (sb_stack, total - sb_stack)
+
+        root = initial_state(self.start, (self.small_blind, self.big_blind))
+        for traverser in (0, 1):
+            self._decide(traverser, root)
+
+    def _bucket(self, player, street):
+        bucket = self.buckets[player][street]
+        if bucket is None:
+            hand = [CARDS[c] for c in self.hands[player]]
+            board = [CARDS[c] for c in self.board[:BOARD_SIZES[street]]]
+            # Rounded to float32 exactly as the observation vector stores it
+            strength = float(np.float32(self.observer.hand_strength(hand, board)))
+            bucket = self.buckets[player][street] = strength_bucket(strength, self.num_buckets)
+        return bucket
+
+    def _decide(self, traverser, state):
+        """Value for `traverser` of the decision of the player to act in `state`."""
+        if is_forced(state):
+            return self._act(traverser, state, 1)
+
+        street, player, stacks, bets, pot = state[:5]
+        opponent = 1 - player
+        raises = min(state.raises, self.max_raises)
+        actions = legal_actions(pot, stacks[player], bets[player], stacks[opponent], bets[opponent], self.max_raises - raises)
+        key = infoset_key(street, self._bucket(player, street), pot, bets[opponent] - bets[player],
+                          stacks[player], stacks[opponent], self.big_blind, raises)
+        row = infoset_index(key, self.table_bits)
+        # Regret matching in plain Python: rows are 6 wide, too small for NumPy calls to pay off
+        regrets = self.regrets[row].tolist()
+        positive = [max(regrets[a], 0.0) for a in actions]
+        total = sum(positive)
+        sigma = [r / total for r in positive] if total > 0 else [1 / len(actions)] * len(actions)
+
+        if player == traverser:
+            values = [self._act(traverser, state, a) for a in actions]
+            value = sum(p * v for p, v in zip(sigma, values))
+            self.regrets[row, actions] += [v - value for v in values]
+            return value
+
+        self.strategy[row, actions] += sigma
+        r = self.rng.random()
+        for action, p in zip(actions, sigma):
+            r -= p
+            if r < 0:
+                break
+        return self._act(traverser, state, action)
+
+    def _act(self, traverser, state, action):
+        """Applies `action`, then continues to the next decision or the payoff."""
+        state, outcome = apply_action(state, action)
+        if outcome is None:
+            return self._decide(traverser, state)
+        winner = self._showdown_winner() if outcome == SHOWDOWN else outcome
+        return self._payoff(traverser, state.stacks, state.pot, winner)
+
+    def _showdown_winner(self):
+        """0 or 1, or None for a tie."""
+        if self.ranks is None:
+            self.ranks = [evaluate_codes(hand, self.board) for hand in self.hands]
+        if self.ranks[0] == self.ranks[1]:
+            return None
+        return 0 if self.ranks[0] < self.ranks[1] else 1
+
+    def _payoff(self, traverser, stacks, pot, winner):
+        # Ties split the pot (PokerEnvironment gives it to seat 0, which the abstraction can't see)
+        won = pot / 2 if winner is None else pot * (winner == traverser)
+        return stacks[traverser] + won - self.start[traverser]
+
+def new_tables(table_bits, shared=False):
+    """Zeroed (regrets, strategy) tables, in shared memory if `shared`."""
+    shape = (1 << table_bits, NUM_ACTIONS)
+    if not shared:
+        return np.zeros(shape, dtype=np.float32), np.zeros(shape, dtype=np.float32)
+    ctx = mp.get_context('spawn')
+    return ctx.RawArray('f', shape[0] * shape[1]), ctx.RawArray('f', shape[0] * shape[1])
+
+def _as_table(table, table_bits):
+    if isinstance(table, np.ndarray):
+        return table
+    return np.frombuffer(table, dtype=np.float32).reshape(1 << table_bits, NUM_ACTIONS)
+
+def save_tables(path, regrets, strategy, meta):
+    """Writes a checkpoint: each file goes to a temporary name first, so a crash never leaves a torn table."""
+    os.makedirs(path, exist_ok=True)
+    for name, table in (('regrets', regrets), ('strategy', strategy)):
+        tmp = os.path.join(path, f"{name}.tmp.npy")
+        np.save(tmp, table)
+        os.replace(tmp, os.path.join(path, f"{name}.npy"))
+    tmp = os.path.join(path, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+def load_meta(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        return json.load(f)
+
+def _make_observer(meta):
+    return Observer(meta['starting_chips'], meta['preflop_equity'], meta['postflop_equity'], meta['equity_samples'])
+
+def _solver(regrets, strategy, meta, seed):
+    bits = meta['table_bits']
+    return ExternalSamplingMCCFR(_as_table(regrets, bits), _as_table(strategy, bits), _make_observer(meta), meta['num_buckets'],
+                                 meta['max_raises'], meta['starting_chips'], tuple(meta['blinds']), seed)
+
+def _worker(regrets, strategy, meta, seed, claimed, done, target):
+    solver = _solver(regrets, strategy, meta, seed)
+    while True:
+        with claimed.get_lock():
+            n = min(ITERATION_CHUNK, target - claimed.value)
+            claimed.value += max(n, 0)
+        if n <= 0:
+            return
+        for _ in range(n):
+            solver.iterate()
+        with done.get_lock():
+            done.value += n
+
+def solve(iterations=CFR_ITERATIONS, num_workers=CFR_WORKERS, path=CFR_PATH, checkpoint_interval=CFR_CHECKPOINT_INTERVAL,
+          seed=SEED, verbose=True):
+    """
+    Runs `iterations` more MCCFR iterations, resuming from the checkpoint at `path` if
+    there is one, on `num_workers` processes (0 = in this process). Returns the final
+    meta dict; the tables are saved to `path`.
+    """
+    if path and os.path.exists(os.path.join(path, 'meta.json')):
+        meta = load_meta(path)
+        loaded = [np.load(os.path.join(path, f"{name}.npy")) for name in ('regrets', 'strategy')]
+        if verbose:
+            print(f"Resuming from {meta['iterations']} iterations in {path}")
+    else:
+        meta = {'iterations': 0, 'table_bits': CFR_TABLE_BITS, 'num_buckets': CFR_BUCKETS, 'max_raises': CFR_MAX_RAISES,
+                'starting_chips': STARTING_CHIPS, 'blinds': [10, 20], 'preflop_equity': USE_PREFLOP_EQUITY,
+                'postflop_equity': USE_POSTFLOP_EQUITY, 'equity_samples': EQUITY_SAMPLES}
+        loaded = None
+    bits = meta['table_bits']
+    regrets, strategy = new_tables(bits, shared=num_workers > 0)
+    if loaded is not None:
+        _as_table(regrets, bits)[:], _as_table(strategy, bits)[:] = loaded
+
+    start_iterations = meta['iterations']
+    target = start_iterations + iterations
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(max(num_workers, 1))]
+    # Resumed runs continue with fresh deals rather than replaying the first run's
+    seeds = [s ^ start_iterations for s in seeds]
+    start = time.perf_counter()
+
+    def checkpoint(done):
+        meta['iterations'] = done
+        if path:
+            save_tables(path, _as_table(regrets, bits), _as_table(strategy, bits), meta)
+        if verbose:
+            rate = (done - start_iterations) / max(time.perf_counter() - start, 1e-9)
+            print(f"Iteration {done}: {rate:.0f} iterations/s, {int((_as_table(strategy, bits).any(axis=1)).sum())} infosets visited")
+
+    next_checkpoint = start_iterations + checkpoint_interval
+    if num_workers > 0:
+        ctx = mp.get_context('spawn')
+        claimed, done = ctx.Value('q', start_iterations), ctx.Value('q', start_iterations)
+        workers = [ctx.Process(target=_worker, args=(regrets, strategy, meta, s, claimed, done, target), daemon=True)
+                   for s in seeds]
+        for w in workers:
+            w.start()
+        try:
+            while any(w.is_alive() for w in workers):
+                time.sleep(0.5)
+                if next_checkpoint <= done.value < target:
+                    checkpoint(done.value)
+                    next_checkpoint += checkpoint_interval
+        finally:
+            for w in workers:
+                w.join()
+    else:
+        solver = _solver(regrets, strategy, meta, seeds[0])
+        for done in range(start_iterations + 1, target + 1):
+            solver.iterate()
+            if done >= next_checkpoint and done < target:
+                checkpoint(done)
+                next_checkpoint += checkpoint_interval
+    checkpoint(target)
+    return meta
+
+def main():
+    parser = argparse.ArgumentParser(description="Run external-sampling MCCFR on the abstracted heads-up game.")
+    parser.add_argument('--iterations', type=int, default=CFR_ITERATIONS)
+    parser.add_argument('--workers', type=int, default=CFR_WORKERS)
+    parser.add_argument('--path', default=CFR_PATH, help="checkpoint directory, resumed if it exists")
+    parser.add_argument('--checkpoint-interval', type=int, default=CFR_CHECKPOINT_INTERVAL)
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+    solve(args.iterations, args.workers, args.path, args.checkpoint_interval, args.seed)
+
+if __name__ == "__main__":
+    main()
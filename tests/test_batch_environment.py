@@ -0,0 +1,46 @@
+import numpy as np
+from game.batch_environment import BatchPokerEnvironment
+from game.card import CARDS
+from game.environment import PokerEnvironment
+from game.player import Player
+
+class FixedDraws:
+    """Deck RNG that always draws the next card in place, so a Deck deals its cards in list order."""
+    def random(self):
+        return 0.0
+
+def scalar_env(deck):
+    env = PokerEnvironment([Player('P0'), Player('P1')])
+    env.deck.rng = FixedDraws()
+    deal(env, deck)
+    return env
+
+def deal(env, deck):
+    # Same deal as a BatchPokerEnvironment row: seat 0 gets deck[0:2], seat 1 deck[2:4], the board deck[4:9]
+    if min(p.chips for p in env.players) <= 0:
+        for p in env.players:
+            p.reset_chips(1000)
+    env.deck.cards[:] = [CARDS[c] for c in deck]
+    env.reset()
+
+def test_batch_matches_scalar_environment():
+    num_tables, num_steps = 16, 3000
+    rng = np.random.default_rng(0)
+    batch = BatchPokerEnvironment(num_tables, seed=0)
+    batch.reset()
+    envs = [scalar_env(deck) for deck in batch.deck.astype(int).tolist()]
+    hands = 0
+    for _ in range(num_steps):
+        np.testing.assert_allclose(batch.observe(), np.stack([env.observe() for env in envs]), rtol=1e-6)
+        actions = rng.integers(0, 6, size=num_tables)
+        _, rewards, dones = batch.step(actions)
+        for row, env in enumerate(envs):
+            _, reward, done = env.step(int(actions[row]))
+            assert (reward, done) == (rewards[row], dones[row])
+            if done:
+                hands += 1
+                deal(env, batch.deck[row].astype(int).tolist())
+            assert [p.chips for p in env.players] == batch.chips[row].tolist()
+            assert env.table.pot == batch.pot[row]
+            assert env.current_player_index == batch.current_player_index[row]
+    assert hands > 500
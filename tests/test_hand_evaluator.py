@@ -0,0 +1,47 @@
+from collections import Counter
+from itertools import combinations
+import numpy as np
+from game.hand_evaluator import evaluate_codes, evaluate_hands
+
+# Worst score of each category in the treys/Cactus Kev order, best category first
+CATEGORY_LIMITS = [10, 166, 322, 1599, 1609, 2467, 3325, 6185, 7462]
+
+def reference_category(cards):
+    """Category of a 5-card hand (0 = straight flush ... 8 = high card), by counting ranks and suits."""
+    ranks = sorted({c % 13 for c in cards})
+    counts = sorted(Counter(c % 13 for c in cards).values(), reverse=True)
+    flush = len({c // 13 for c in cards}) == 1
+    straight = len(ranks) == 5 and (ranks[4] - ranks[0] == 4 or ranks == [0, 1, 2, 3, 12])
+    if straight and flush:
+        return 0
+    if counts[0] == 4:
+        return 1
+    if counts[:2] == [3, 2]:
+        return 2
+    if flush:
+        return 3
+    if straight:
+        return 4
+    if counts[0] == 3:
+        return 5
+    if counts[:2] == [2, 2]:
+        return 6
+    return 7 if counts[0] == 2 else 8
+
+def category(score):
+    return next(i for i, limit in enumerate(CATEGORY_LIMITS) if score <= limit)
+
+def test_five_card_categories():
+    rng = np.random.default_rng(0)
+    for cards in rng.random((5000, 52)).argsort(axis=1)[:, :5].tolist():
+        assert category(evaluate_codes(cards[:2], cards[2:])) == reference_category(cards)
+    # Royal flush and 7-5-4-3-2 offsuit bound the scale
+    assert evaluate_codes([12, 11], [10, 9, 8]) == 1
+    assert evaluate_codes([5, 16], [2, 27, 39]) == 7462
+
+def test_seven_card_score_is_best_five_card_subset():
+    cards = np.random.default_rng(1).random((500, 52)).argsort(axis=1)[:, :7]
+    scores = evaluate_hands(cards[:, :2], cards[:, 2:])
+    for row, score in zip(cards.tolist(), scores.tolist()):
+        assert evaluate_codes(row[:2], row[2:]) == score
+        assert score == min(evaluate_codes(five[:2], five[2:]) for five in combinations(row, 5))
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import numpy as np
+import pytest
+from config.config import STATE_DIM
+from serving.client import PolicyClient
+from serving.server import PolicyServer
+
+MODEL = os.path.join(os.path.dirname(__file__), '..', 'pokerbot_dqn.pth')
+
+class FailingPolicy:
+    state_dim = STATE_DIM
+
+    def select_actions(self, states):
+        raise RuntimeError("broken checkpoint")
+
+async def run_server(tmp_path, check):
+    """Serves the shipped model on a Unix socket in `tmp_path` and runs `check(server, client)` against it."""
+    server = PolicyServer(MODEL, window=0, reload_interval=3600)
+    path = str(tmp_path / 'pokerbot.sock')
+    listener = await asyncio.start_unix_server(server.handle, path=path)
+    loop_task = asyncio.create_task(server.batch_loop())
+    client = await PolicyClient.connect(path)
+    try:
+        await asyncio.wait_for(check(server, client), 10)
+    finally:
+        await client.close()
+        loop_task.cancel()
+        listener.close()
+        await listener.wait_closed()
+
+def test_malformed_request_is_rejected(tmp_path):
+    state = np.random.default_rng(0).random(STATE_DIM, dtype=np.float32)
+
+    async def check(server, client):
+        with pytest.raises(RuntimeError):
+            await client.act(np.full(STATE_DIM, np.nan, dtype=np.float32))
+        assert await client.act(state) == int(server.policy.select_actions(state[None])[0])
+        assert (await client.stats())['errors'] == 1
+    asyncio.run(run_server(tmp_path, check))
+
+def test_policy_error_keeps_serving(tmp_path):
+    state = np.random.default_rng(1).random(STATE_DIM, dtype=np.float32)
+
+    async def check(server, client):
+        policy, server.policy = server.policy, FailingPolicy()
+        with pytest.raises(RuntimeError):
+            await client.act(state)
+        server.policy = policy
+        assert await client.act(state) == int(policy.select_actions(state[None])[0])
+    asyncio.run(run_server(tmp_path, check))
@@ -0,0 +1,198 @@
+"""
+Actor/learner training: NUM_WORKERS rollout processes each play their own
+PokerEnvironment with a snapshot of the DQN and stream transitions to the learner,
+which owns the replay buffer and the optimizer and publishes new weights back to
+the workers every WEIGHT_SYNC_INTERVAL gradient steps.
+
+The learner takes one learning round (UPDATES_PER_TRAIN gradient steps) per
+TRAIN_EVERY transitions received, as train() does, and stores chunks between rounds
+rather than training through each one as it arrives; it may lag up to a chunk per
+worker behind. Raising TRAIN_EVERY lowers the replay ratio and lifts the learner's
+cap on hands/s.
+"""
+import queue
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from game.environment import PokerEnvironment
+from game.player import Player
+from agents.dqn_agent import DQN, DQNAgent
+from agents.random_agent import RandomAgent
+from config.config import *
+from training.train import make_agent, make_observer, spawn_seeds
+from utils.chips_history import plot_chips_history
+from utils.profiler import PROFILER
+
+def _publish_weights(agent, shared_model, weights_version):
+    """Copies the learner's weights into the shared-memory model and bumps its version."""
+    with weights_version.get_lock():
+        shared_model.load_state_dict(agent.model.state_dict())
+        weights_version.value += 1
+
+def rollout_worker(shared_model, weights_version, epsilon, transition_queue, stop_event, seed=None):
+    """
+    Plays hands against a RandomAgent with the latest published weights and sends the
+    DQN's transitions to the learner in chunks of ROLLOUT_CHUNK. Each chunk is a tuple
+    of tensors (moved to shared memory by the queue) plus the DQN's chip count after
+    every hand finished in it and the worker's profiler numbers for the chunk. `seed`
+    seeds the worker's deals and both agents' exploration.
+    """
+    torch.set_num_threads(1) # One core per worker; parallelism comes from the processes
+    PROFILER.configure(PROFILE)
+    p1 = Player('DQN', chips=STARTING_CHIPS)
+    p2 = Player('Random', chips=STARTING_CHIPS)
+    env_seed, agent_seed, opponent_seed = spawn_seeds(seed, 3)
+    env = PokerEnvironment([p1, p2], observer=make_observer(), seed=env_seed)
+    agent = DQNAgent(STATE_DIM, ACTION_DIM, seed=agent_seed)
+    opponent = RandomAgent(ACTION_DIM, seed=opponent_seed)
+    local_version = -1
+
+    transitions, chips_history = [], []
+    while not stop_event.is_set():
+        if weights_version.value != local_version:
+            with weights_version.get_lock():
+                agent.model.load_state_dict(shared_model.state_dict())
+                local_version = weights_version.value
+        agent.epsilon = epsilon.value
+
+        if p1.chips <= 0 or p2.chips <= 0:
+            p1.reset_chips(STARTING_CHIPS)
+            p2.reset_chips(STARTING_CHIPS)
+
+        with PROFILER.section('env_reset'):
+            env.reset()
+        with PROFILER.section('observe'):
+            s = env.observe()
+        done = False
+        while not done:
+            with PROFILER.section('select_action'):
+                if env.current_player_index == 0:
+                    action = agent.select_action(s)
+                else:
+                    action = opponent.select_action(s)
+
+            with PROFILER.section('env_step'):
+                _, reward, done = env.step(action)
+            # Fresh arrays: the chunk keeps references until it is sent
+            with PROFILER.section('observe'):
+                s_ = env.observe()
+            PROFILER.count('decisions')
+
+            if env.current_player_index == 0:
+                transitions.append((s, action, reward, s_, done))
+
+            s = s_
+
+        chips_history.append(p1.chips)
+        PROFILER.count('hands')
+
+        if len(transitions) >= ROLLOUT_CHUNK:
+            s, a, r, s_, d = map(np.array, zip(*transitions))
+            chunk = (torch.from_numpy(s), torch.from_numpy(a),
+                     torch.from_numpy(r.astype(np.float32)), torch.from_numpy(s_),
+                     torch.from_numpy(d.astype(np.float32)), chips_history, PROFILER.take())
+            # Block with a timeout so a full queue can't hang shutdown
+            while not stop_event.is_set():
+                try:
+                    transition_queue.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            transitions, chips_history = [], []
+
+    # Exit without waiting for unsent chunks to be flushed; the learner has stopped reading
+    transition_queue.cancel_join_thread()
+
+def train_distributed(num_workers=NUM_WORKERS):
+    ctx = mp.get_context('spawn')
+    if SEED is not None:
+        torch.manual_seed(SEED)
+    if TORCH_NUM_THREADS:
+        torch.set_num_threads(TORCH_NUM_THREADS) # Learner threads; each worker keeps one
+    agent_seed, *worker_seeds = spawn_seeds(SEED, num_workers + 1)
+    agent = make_agent(agent_seed)
+
+    shared_model = DQN(STATE_DIM, ACTION_DIM)
+    shared_model.share_memory()
+    weights_version = ctx.Value('q', 0)
+    epsilon = ctx.Value('d', agent.epsilon)
+    _publish_weights(agent, shared_model, weights_version)
+
+    transition_queue = ctx.Queue(maxsize=4 * num_workers)
+    stop_event = ctx.Event()
+    workers = [
+        ctx.Process(target=rollout_worker, args=(shared_model, weights_version, epsilon, transition_queue, stop_event, seed), daemon=True)
+        for seed in worker_seeds
+    ]
+    for w in workers:
+        w.start()
+
+    dqn_chips_history = []
+    episode = 0
+    received = 0 # Transitions stored, which earn a learning round every TRAIN_EVERY as in train()
+    rounds = 0
+    max_lag = ROLLOUT_CHUNK * num_workers
+    steps_since_sync = 0
+    # Worker sections and counters are merged into the learner's reports; with several
+    # workers their section shares can exceed 100% of the learner's wall time
+    PROFILER.configure(PROFILE, METRICS_PATH)
+    try:
+        while episode < EPISODES:
+            # Take the next chunk while the learner is less than max_lag transitions behind
+            # train()'s TRAIN_EVERY rounds, otherwise (or when none is waiting) train a round.
+            # Workers are only held up when the learner falls that far behind.
+            owed = received // TRAIN_EVERY - rounds
+            if owed * TRAIN_EVERY < max_lag:
+                try:
+                    with PROFILER.section('queue_wait'):
+                        s, a, r, s_, d, chips_history, worker_profile = transition_queue.get(block=owed == 0)
+                except queue.Empty:
+                    pass
+                else:
+                    PROFILER.merge(worker_profile)
+                    with PROFILER.section('store'):
+                        agent.store_batch(s.numpy(), a.numpy(), r.numpy(), s_.numpy(), d.numpy())
+                    received += len(a)
+                    del s, a, r, s_, d # Release the shared-memory segments
+
+                    for chips in chips_history[:EPISODES - episode]:
+                        dqn_chips_history.append(chips)
+
+                        if episode % TARGET_UPDATE == 0:
+                            agent.update_target()
+
+                        if episode % 10 == 0:
+                            agent.decay_epsilon()
+                            epsilon.value = agent.epsilon
+
+                        if episode % 100 == 0:
+                            print(f"Episode {episode}, DQN Chips: {chips}, Epsilon: {agent.epsilon:.4f}")
+                        episode += 1
+
+                        if episode % PROFILE_INTERVAL == 0:
+                            PROFILER.report(episode=episode, epsilon=agent.epsilon)
+                    continue
+
+            with PROFILER.section('train_step'):
+                steps_since_sync += agent.train_round(BATCH_SIZE)
+            rounds += 1
+
+            if steps_since_sync >= WEIGHT_SYNC_INTERVAL:
+                _publish_weights(agent, shared_model, weights_version)
+                steps_since_sync = 0
+    finally:
+        PROFILER.report(final=True, episode=episode, epsilon=agent.epsilon)
+
+    stop_event.set()
+    for w in workers:
+        w.join()
+
+    plot_chips_history(dqn_chips_history, PLOT_PATH)
+
+    # Save the trained model
+    print("Training finished. Saving model...")
+    agent.save("pokerbot_dqn.pth")
+    agent.memory.flush()
+
+if __name__ == "__main__":
+    train_distributed()
@@ -0,0 +1,239 @@
+"""
+League training: instead of a fixed RandomAgent, the DQN plays a pool of frozen
+snapshots of itself (and the random agent). Every LEAGUE_SNAPSHOT_INTERVAL hands the
+current network joins the pool, whose oldest snapshot drops out beyond
+LEAGUE_POOL_SIZE.
+
+LEAGUE_TABLES tables play at once on a BatchPokerEnvironment, each a match of
+LEAGUE_MATCH_HANDS hands against one opponent, so each decision step costs one
+batched forward pass for the learner and one per distinct opponent. Opponents are
+drawn by prioritized fictitious self-play: with weight (1 - p) ** LEAGUE_PFSP_POWER,
+where p is the learner's match win rate against them, so the opponents it still
+loses to are played most. Snapshots are loaded as NumPy policies through an LRU
+cache of LEAGUE_CACHE_SIZE entries, so a new match rarely touches the disk.
+
+The pool and its results are kept in LEAGUE_PATH and resumed by later runs.
+"""
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+import torch
+from game.batch_environment import BatchPokerEnvironment
+from agents.policy import load_policy
+from agents.random_agent import RandomAgent
+from config.config import *
+from training.train import make_agent, make_observer, spawn_seeds
+from utils.chips_history import plot_chips_history
+from utils.profiler import PROFILER
+
+RANDOM = 'random' # Pool name of the RandomAgent, which never leaves the pool
+
+class PolicyCache:
+    """The last `capacity` snapshot policies used, by path."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.policies = OrderedDict()
+
+    def get(self, path):
+        policy = self.policies.get(path)
+        if policy is not None:
+            self.policies.move_to_end(path)
+            PROFILER.count('cache_hits')
+            return policy
+        with PROFILER.section('load_opponent'):
+            policy = self.policies[path] = load_policy(path)
+        PROFILER.count('cache_loads')
+        if len(self.policies) > self.capacity:
+            self.policies.popitem(last=False)
+        return policy
+
+    def discard(self, path):
+        self.policies.pop(path, None)
+
+class League:
+    """
+    The opponent pool: one entry per opponent with the learner's match results
+    against it, persisted to `path`/league.json next to the snapshot files.
+    """
+    def __init__(self, path=LEAGUE_PATH, pool_size=LEAGUE_POOL_SIZE, cache_size=LEAGUE_CACHE_SIZE,
+                 pfsp_power=LEAGUE_PFSP_POWER, seed=None):
+        self.path = path
+        self.pool_size = pool_size
+        self.pfsp_power = pfsp_power
+        self.cache = PolicyCache(cache_size)
+        self.rng = np.random.default_rng(seed)
+        self.random_agent = RandomAgent(ACTION_DIM, seed=self.rng.integers(2 ** 63))
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, 'league.json')):
+            with open(os.path.join(path, 'league.json')) as f:
+                state = json.load(f)
+            self.entries, self.hands = state['entries'], state['hands']
+        else:
+            self.entries, self.hands = [{'name': RANDOM, 'wins': 0.0, 'matches': 0}], 0
+
+    def add_snapshot(self, agent):
+        """Freezes the learner's current network into the pool."""
+        name = f"snapshot_{self.hands}.pth"
+        agent.save(os.path.join(self.path, name))
+        self.entries.append({'name': name, 'wins': 0.0, 'matches': 0})
+        snapshots = [e for e in self.entries if e['name'] != RANDOM]
+        if len(snapshots) > self.pool_size:
+            oldest = snapshots[0]
+            self.entries.remove(oldest)
+            self.cache.discard(os.path.join(self.path, oldest['name']))
+            os.remove(os.path.join(self.path, oldest['name']))
+
+    def win_rates(self):
+        # Smoothed towards 1/2, so new opponents start out even
+        return np.array([(e['wins'] + 1) / (e['matches'] + 2) for e in self.entries])
+
+    def sample(self, n):
+        """`n` opponent names, drawn by PFSP."""
+        weights = (1.0 - self.win_rates()) ** self.pfsp_power
+        picks = self.rng.choice(len(self.entries), size=n, p=weights / weights.sum())
+        return [self.entries[i]['name'] for i in picks]
+
+    def policy(self, name):
+        if name == RANDOM:
+            return self.random_agent
+        return self.cache.get(os.path.join(self.path, name))
+
+    def record(self, name, chips_won):
+        """Counts a finished match: a win if the learner came out ahead, half a win if even."""
+        for entry in self.entries:
+            if entry['name'] == name: # Unless it has left the pool since
+                entry['wins'] += 1.0 if chips_won > 0 else 0.5 if chips_won == 0 else 0.0
+                entry['matches'] += 1
+                return
+
+    def save(self):
+        tmp = os.path.join(self.path, 'league.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'hands': self.hands, 'entries': self.entries}, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, 'league.json'))
+
+    def summary(self):
+        return {e['name']: round(float(p), 3) for e, p in zip(self.entries, self.win_rates())}
+
+class Matches:
+    """Which opponent each table is playing, and the learner's chips and hands in the current match."""
+    def __init__(self, league, num_tables):
+        self.league = league
+        self.names = league.sample(num_tables)
+        self.policies = [league.policy(name) for name in self.names] # Pinned for the whole match
+        self.chips_won = np.zeros(num_tables, dtype=np.int64)
+        self.hands = np.zeros(num_tables, dtype=np.int64)
+
+    def finish_hands(self, rows, rewards):
+        """Adds finished hands; tables whose match is over record it and draw a new opponent."""
+        self.chips_won[rows] += rewards
+        self.hands[rows] += 1
+        over = rows[self.hands[rows] >= LEAGUE_MATCH_HANDS]
+        if over.size:
+            for row, name in zip(over, self.league.sample(over.size)):
+                self.league.record(self.names[row], self.chips_won[row])
+                self.names[row], self.policies[row] = name, self.league.policy(name)
+            self.chips_won[over] = 0
+            self.hands[over] = 0
+
+    def select_actions(self, env, rows, actions):
+        """Fills in the opponents' actions on `rows`: one batched call per distinct opponent."""
+        names = np.array(self.names, dtype=object)[rows]
+        random_rows = names == RANDOM
+        # The random agent ignores the state, so its tables aren't encoded
+        actions[rows[random_rows]] = self.league.random_agent.select_actions(np.empty((random_rows.sum(), 0), dtype=np.float32))
+        rows, names = rows[~random_rows], names[~random_rows]
+        if rows.size == 0:
+            return
+        mask = np.zeros(env.num_tables, dtype=bool)
+        mask[rows] = True
+        observations = env.observe(mask=mask)
+        for name in set(names):
+            group = names == name
+            actions[rows[group]] = self.policies[rows[group][0]].select_actions(observations[group])
+
+def train_league(episodes=EPISODES, num_tables=LEAGUE_TABLES):
+    if SEED is not None:
+        torch.manual_seed(SEED)
+    if TORCH_NUM_THREADS:
+        torch.set_num_threads(TORCH_NUM_THREADS)
+    env_seed, agent_seed, league_seed = spawn_seeds(SEED, 3)
+    env = BatchPokerEnvironment(num_tables, starting_chips=STARTING_CHIPS, seed=env_seed, observer=make_observer())
+    agent = make_agent(agent_seed)
+    league = League(seed=league_seed)
+    print(f"League of {len(league.entries)} opponents in {LEAGUE_PATH}")
+    matches = Matches(league, num_tables)
+
+    # The learner's last decision on each table, completed into a transition by its next decision or the end of the hand
+    pending = np.zeros(num_tables, dtype=bool)
+    pending_s = np.empty((num_tables, STATE_DIM), dtype=np.float32)
+    pending_a = np.zeros(num_tables, dtype=np.int64)
+    actions = np.empty(num_tables, dtype=np.int64)
+    chips_won = []
+    total_won = 0
+    episode = 0
+    PROFILER.configure(PROFILE, METRICS_PATH)
+
+    def store(rows, s_, rewards, done):
+        if rows.size:
+            with PROFILER.section('store'):
+                agent.store_batch(pending_s[rows], pending_a[rows], rewards.astype(np.float32), s_, np.full(rows.size, done, dtype=np.float32))
+            with PROFILER.section('train_step'):
+                agent.train_steps(rows.size, BATCH_SIZE)
+
+    env.reset()
+    try:
+        while episode < episodes:
+            learner = env.current_player_index == 0
+            rows = np.flatnonzero(learner)
+            with PROFILER.section('observe'):
+                s = env.observe(mask=learner)
+            store(rows[pending[rows]], s[pending[rows]], np.zeros(pending[rows].sum()), False)
+            with PROFILER.section('select_action'):
+                actions[rows] = agent.select_actions(s)
+                matches.select_actions(env, np.flatnonzero(~learner), actions)
+            pending_s[rows], pending_a[rows], pending[rows] = s, actions[rows], True
+            PROFILER.count('decisions', num_tables)
+
+            with PROFILER.section('env_step'):
+                _, reward, done = env.step(actions)
+            finished = np.flatnonzero(done)
+            if finished.size == 0:
+                continue
+            # Terminal transitions: the next state is masked out by done, so any row will do
+            ended = finished[pending[finished]]
+            store(ended, pending_s[ended], reward[ended], True)
+            pending[finished] = False
+            matches.finish_hands(finished, reward[finished])
+            PROFILER.count('hands', finished.size)
+
+            for r in reward[finished][:episodes - episode]:
+                chips_won.append(r)
+                total_won += r
+                if episode % TARGET_UPDATE == 0:
+                    agent.update_target()
+                if episode % 10 == 0:
+                    agent.decay_epsilon()
+                if episode % 100 == 0:
+                    print(f"Episode {episode}, DQN chips won: {total_won}, Epsilon: {agent.epsilon:.4f}")
+                league.hands += 1
+                if league.hands % LEAGUE_SNAPSHOT_INTERVAL == 0:
+                    league.add_snapshot(agent)
+                    league.save()
+                    print(f"Snapshot {league.hands}: win rates {league.summary()}")
+                episode += 1
+                if episode % PROFILE_INTERVAL == 0:
+                    PROFILER.report(episode=episode, epsilon=agent.epsilon)
+    finally:
+        PROFILER.report(final=True, episode=episode, epsilon=agent.epsilon)
+        league.save()
+
+    plot_chips_history(np.cumsum(chips_won), PLOT_PATH)
+
+    print("Training finished. Saving model...")
+    agent.save("pokerbot_dqn.pth")
+    agent.memory.flush()
+
+if __name__ == "__main__":
+    train_league()
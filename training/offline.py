@@ -0,0 +1,109 @@
+"""
+Offline training: pretrains or fine-tunes the DQN on archived data instead of live
+play. Sources are streamed in chunks through a StreamingLoader whose background
+thread decodes the next batches while the current one trains:
+
+- a replay-buffer directory (REPLAY_PATH of an earlier run), read straight from its
+  memory-mapped files
+- a binary hand history (HAND_HISTORY_PATH), re-simulated hand by hand into the same
+  transitions play_training_hand would have stored for the logged seat
+
+    python -m training.offline hands.bin --epochs 3
+    python -m training.offline replay_buffer --init pokerbot_dqn.pth
+"""
+import argparse
+import os
+import numpy as np
+import torch
+from agents.dqn_agent import DQNAgent
+from config.config import *
+from game.hand_history import read_hands, replay_environment, start_hand
+from game.observation import OBSERVATION_DIM
+from training.train import make_observer
+from utils.offline_dataset import DTYPES, StreamingLoader, replay_chunks
+from utils.profiler import PROFILER
+
+def hand_history_chunks(path, chunk_size=OFFLINE_CHUNK_SIZE, seat=0):
+    """
+    Streams a hand history's transitions for `seat` as chunks of `chunk_size` rows
+    (tuples of arrays in FIELDS order). Each logged hand is replayed with the
+    configured observer, storing a transition whenever `seat` is to act after a step,
+    exactly as play_training_hand does for the DQN in seat 0.
+    """
+    num_players, blinds, records = read_hands(path)
+    env = replay_environment(num_players, blinds, make_observer())
+    player = env.players[seat]
+    shapes = ((chunk_size, OBSERVATION_DIM), (chunk_size,), (chunk_size,), (chunk_size, OBSERVATION_DIM), (chunk_size,))
+    chunk = [np.empty(shape, dtype=dtype) for shape, dtype in zip(shapes, DTYPES)]
+    states, actions, rewards, next_states, dones = chunk
+    s, s_ = np.empty(OBSERVATION_DIM, dtype=np.float32), np.empty(OBSERVATION_DIM, dtype=np.float32)
+    n = 0
+    for record in records:
+        start_hand(env, record)
+        env.observe(out=s)
+        for action in record.actions:
+            _, reward, done = env.step(action)
+            if done: # step() rewards seat 0
+                reward = player.chips - player.starting_chips
+            env.observe(out=s_)
+            if env.current_player_index == seat:
+                states[n], actions[n], rewards[n], next_states[n], dones[n] = s, action, reward, s_, done
+                n += 1
+                if n == chunk_size:
+                    yield tuple(field.copy() for field in chunk)
+                    n = 0
+            s, s_ = s_, s
+    if n:
+        yield tuple(field[:n].copy() for field in chunk)
+
+def make_loader(path, batch_size=BATCH_SIZE, epochs=1, seat=0, seed=None):
+    """A StreamingLoader over a replay-buffer directory or a hand-history file."""
+    if os.path.isdir(path):
+        chunks = lambda: replay_chunks(path, OFFLINE_CHUNK_SIZE)
+    else:
+        chunks = lambda: hand_history_chunks(path, OFFLINE_CHUNK_SIZE, seat)
+    return StreamingLoader(chunks, batch_size, epochs, prefetch=OFFLINE_PREFETCH, seed=seed)
+
+def train_offline(agent, loader, target_update=OFFLINE_TARGET_UPDATE):
+    """Takes one gradient step per loader batch, syncing the target network every `target_update` steps. Returns the steps taken."""
+    steps = 0
+    for s, a, r, s_, d in loader:
+        with PROFILER.section('train_step'):
+            agent.learn(s, a, r, s_, d)
+        steps += 1
+        if steps % target_update == 0:
+            agent.update_target()
+        if steps % PROFILE_INTERVAL == 0:
+            PROFILER.report(grad_steps=steps)
+    agent.update_target()
+    return steps
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the DQN offline on a hand history or a replay-buffer directory.")
+    parser.add_argument('path', help="hand-history file or replay-buffer directory")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--seat', type=int, default=0, help="seat whose decisions a hand history is decoded for")
+    parser.add_argument('--init', default=None, help="model weights to fine-tune (default: fresh weights)")
+    parser.add_argument('--output', default='pokerbot_dqn.pth')
+    parser.add_argument('--seed', type=int, default=SEED)
+    args = parser.parse_args()
+
+    if TORCH_NUM_THREADS:
+        torch.set_num_threads(TORCH_NUM_THREADS)
+    agent_seed, loader_seed = np.random.SeedSequence(args.seed).generate_state(2) if args.seed is not None else (None, None)
+    agent = DQNAgent(STATE_DIM, ACTION_DIM, lr=5e-4, replay_capacity=1, seed=agent_seed, # Batches come from the loader, not replay
+                     compile=LEARNER_COMPILE)
+    if args.init:
+        agent.load(args.init)
+        agent.model.train()
+    PROFILER.configure(PROFILE, METRICS_PATH)
+    try:
+        steps = train_offline(agent, make_loader(args.path, args.batch_size, args.epochs, args.seat, loader_seed))
+    finally:
+        PROFILER.report(final=True)
+    print(f"Offline training finished after {steps} gradient steps. Saving model to {args.output}...")
+    agent.save(args.output)
+
+if __name__ == "__main__":
+    main()
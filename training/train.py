@@ -1,94 +1,174 @@
+import argparse
+import os
 from game.environment import PokerEnvironment
 from game.player import Player
 from agents.dqn_agent import DQNAgent
 from agents.random_agent import RandomAgent
 from config.config import *
 import numpy as np
-from game.hand_evaluator import evaluate_hand, get_preflop_strength
-from game.card import Card
-import matplotlib.pyplot as plt
-
-def encode_state(state):
-    hand_strength = 0
-    if not state['community']:
-        # We subtract from 1.0 because the network expects lower scores to be better.
-        hand_strength = 1.0 - get_preflop_strength(state['hand'])
-    else:
-        # Post-flop: Use the Treys library (1=best, 7462=worst) and normalize.
-        hand_strength = evaluate_hand(state['hand'], state['community']) / 7462.0
-
-    community_ranks = [Card.RANKS.index(c.rank) / 12.0 for c in state['community']]
-    community_ranks += [-1] * (5 - len(community_ranks))
-    
-    state_vector = [
-        hand_strength,
-        *community_ranks,
-        state['chips'] / STARTING_CHIPS,
-        state['pot'] / (STARTING_CHIPS * 2),
-        state['current_bet'] / STARTING_CHIPS,
-        state['opponent_chips'] / STARTING_CHIPS,
-        state['opponent_bet'] / STARTING_CHIPS,
-        state['position'],
-        state['betting_round'] / 4.0 # Normalize betting round
-    ]
-    return np.array(state_vector)
-
-def train():
-    p1 = Player('DQN', chips=STARTING_CHIPS)
-    p2 = Player('Random', chips=STARTING_CHIPS)
-    env = PokerEnvironment([p1, p2])
-    agent = DQNAgent(STATE_DIM, ACTION_DIM, lr=5e-4)
-    opponent = RandomAgent(ACTION_DIM)
+from game.observation import OBSERVATION_DIM, Observer
+from game.hand_history import HandHistoryWriter
+from utils.checkpoint import AsyncCheckpointer, checkpoints, latest_checkpoint, load_checkpoint
+from utils.chips_history import ChipsHistoryWriter, plot_chips_history
+from utils.profiler import PROFILER
+import torch
 
-    dqn_chips_history = []
+def spawn_seeds(seed, n):
+    """`n` independent integer seeds derived from `seed`, or n Nones if it is None."""
+    if seed is None:
+        return [None] * n
+    return [int(s) for s in np.random.SeedSequence(seed).generate_state(n)]
 
-    for episode in range(EPISODES):
-        if p1.chips <= 0 or p2.chips <= 0:
-            p1.reset_chips(STARTING_CHIPS)
-            p2.reset_chips(STARTING_CHIPS)
+def make_observer():
+    """The state encoder configured in config/config.py."""
+    return Observer(STARTING_CHIPS, USE_PREFLOP_EQUITY, USE_POSTFLOP_EQUITY, EQUITY_SAMPLES)
 
-        state = env.reset()
-        done = False
-        while not done:
-            s = encode_state(state)
-            
+def play_training_hand(env, agent, opponent):
+    """Plays one hand, storing the DQN's transitions and taking a gradient step after each."""
+    p1, p2 = env.players
+    if p1.chips <= 0 or p2.chips <= 0:
+        p1.reset_chips(STARTING_CHIPS)
+        p2.reset_chips(STARTING_CHIPS)
+
+    # Two observation buffers, swapped each step: the next state's encoding is the
+    # following step's state. store() copies them into the replay buffer.
+    s, s_ = np.empty(OBSERVATION_DIM, dtype=np.float32), np.empty(OBSERVATION_DIM, dtype=np.float32)
+    with PROFILER.section('env_reset'):
+        env.reset()
+    with PROFILER.section('observe'):
+        env.observe(out=s)
+    done = False
+    while not done:
+        with PROFILER.section('select_action'):
             if env.current_player_index == 0:
                 action = agent.select_action(s)
             else:
                 action = opponent.select_action(s)
 
-            next_state, reward, done = env.step(action)
-            s_ = encode_state(next_state)
+        with PROFILER.section('env_step'):
+            _, reward, done = env.step(action)
+        with PROFILER.section('observe'):
+            env.observe(out=s_)
+        PROFILER.count('decisions')
 
-            if env.current_player_index == 0:
+        if env.current_player_index == 0:
+            with PROFILER.section('store'):
                 agent.store(s, action, reward, s_, done)
+            with PROFILER.section('train_step'):
                 agent.train_step(BATCH_SIZE)
+
+        s, s_ = s_, s
+    PROFILER.count('hands')
+
+def make_agent(seed=None):
+    agent = DQNAgent(STATE_DIM, ACTION_DIM, lr=5e-4, prioritized=PRIORITIZED_REPLAY, per_alpha=PER_ALPHA, per_beta=PER_BETA,
+                     replay_capacity=REPLAY_CAPACITY, replay_path=REPLAY_PATH, replay_features=make_observer().config(), seed=seed,
+                     train_every=TRAIN_EVERY, updates_per_call=UPDATES_PER_TRAIN, compile=LEARNER_COMPILE)
+    if len(agent.memory):
+        print(f"Resuming with {len(agent.memory)} transitions from {REPLAY_PATH}")
+    return agent
+
+def run_config(env):
+    """The settings a checkpoint is only valid under: the observation features and the replay layout."""
+    return {'state_dim': STATE_DIM, **env.observer.config(), 'prioritized_replay': PRIORITIZED_REPLAY,
+            'replay_capacity': REPLAY_CAPACITY}
+
+def training_state(episode, env, agent, opponent):
+    """Snapshot for AsyncCheckpointer of everything train() needs to continue after `episode` hands."""
+    return {'episode': episode, 'config': run_config(env), 'agent': agent.training_state(CHECKPOINT_REPLAY), 'env': env.state_dict(),
+            'opponent_rng': (opponent.rng.getstate(), opponent.np_rng.bit_generator.state),
+            'torch_rng': torch.get_rng_state()}
+
+def resume(file, env, agent, opponent):
+    """Restores a training_state() checkpoint; returns the episode to continue from."""
+    state = load_checkpoint(file)
+    config, expected = state.get('config', {}), run_config(env)
+    changed = sorted(key for key in expected if config.get(key) != expected[key])
+    if changed:
+        raise ValueError(f"{file} was written with different settings ({', '.join(changed)}); "
+                         f"restore them, or train afresh without --resume")
+    agent.load_training_state(state['agent'])
+    env.load_state_dict(state['env'])
+    opponent.rng.setstate(state['opponent_rng'][0])
+    opponent.np_rng.bit_generator.state = state['opponent_rng'][1]
+    torch.set_rng_state(state['torch_rng'])
+    return state['episode']
+
+def train(resume_run=RESUME):
+    p1 = Player('DQN', chips=STARTING_CHIPS)
+    p2 = Player('Random', chips=STARTING_CHIPS)
+    if SEED is not None:
+        torch.manual_seed(SEED)
+    if TORCH_NUM_THREADS:
+        torch.set_num_threads(TORCH_NUM_THREADS)
+    env_seed, agent_seed, opponent_seed = spawn_seeds(SEED, 3)
+    env = PokerEnvironment([p1, p2], observer=make_observer(), seed=env_seed)
+    if HAND_HISTORY_PATH:
+        env.history = HandHistoryWriter(HAND_HISTORY_PATH, len(env.players), (env.small_blind, env.big_blind))
+    agent = make_agent(agent_seed)
+    opponent = RandomAgent(ACTION_DIM, seed=opponent_seed)
+
+    start_episode = 0
+    checkpoint = latest_checkpoint(CHECKPOINT_PATH) if resume_run else None
+    if checkpoint is not None:
+        start_episode = resume(checkpoint, env, agent, opponent)
+        if start_episode >= EPISODES:
+            raise ValueError(f"{checkpoint} already completed {start_episode} of EPISODES = {EPISODES}; "
+                             f"raise EPISODES to train on, or train afresh without --resume")
+        print(f"Resuming from {checkpoint} at episode {start_episode}")
+    if checkpoint is None and CHECKPOINT_PATH:
+        for old in checkpoints(CHECKPOINT_PATH) if os.path.isdir(CHECKPOINT_PATH) else []:
+            os.remove(old) # A fresh run's checkpoints replace an earlier run's, as its chips history does
+    checkpointer = AsyncCheckpointer(CHECKPOINT_PATH, CHECKPOINT_KEEP) if CHECKPOINT_PATH else None
+    history = ChipsHistoryWriter(HISTORY_PATH, start_episode)
+    PROFILER.configure(PROFILE, METRICS_PATH)
+
+    def save_checkpoint(episode):
+        with PROFILER.section('checkpoint'):
+            history.flush()
+            checkpointer.save(episode, training_state(episode, env, agent, opponent), on_write=agent.memory.flush)
+
+    episode = start_episode
+    try:
+        for episode in range(start_episode, EPISODES):
+            play_training_hand(env, agent, opponent)
+            history.write(episode, p1.chips, agent.epsilon)
+
+            if episode % TARGET_UPDATE == 0:
+                agent.update_target()
+            
+            if episode % 10 == 0:
+                agent.decay_epsilon()
             
-            state = next_state
-        
-        dqn_chips_history.append(p1.chips)
-
-        if episode % TARGET_UPDATE == 0:
-            agent.update_target()
-        
-        if episode % 10 == 0:
-            agent.decay_epsilon()
-        
-        if episode % 100 == 0:
-            print(f"Episode {episode}, DQN Chips: {p1.chips}, Epsilon: {agent.epsilon:.4f}")
-
-    # Plotting the P/L curve
-    plt.figure(figsize=(10, 5))
-    plt.plot(dqn_chips_history)
-    plt.title('DQN Bot P/L Over Time')
-    plt.xlabel('Episode')
-    plt.ylabel('Total Chips')
-    plt.grid(True)
-    plt.show()
+            if episode % 100 == 0:
+                print(f"Episode {episode}, DQN Chips: {p1.chips}, Epsilon: {agent.epsilon:.4f}")
+
+            if (episode + 1) % PROFILE_INTERVAL == 0:
+                PROFILER.report(episode=episode + 1, epsilon=agent.epsilon)
+
+            if checkpointer is not None and (episode + 1) % CHECKPOINT_INTERVAL == 0:
+                save_checkpoint(episode + 1)
+        episode = EPISODES
+        if checkpointer is not None and start_episode < EPISODES and EPISODES % CHECKPOINT_INTERVAL:
+            save_checkpoint(EPISODES)
+    finally:
+        # Also covers interrupted runs
+        PROFILER.report(final=True, episode=episode, epsilon=agent.epsilon)
+        history.close()
+        if env.history is not None:
+            env.history.close()
+        if checkpointer is not None:
+            checkpointer.close()
+
+    plot_chips_history(HISTORY_PATH, PLOT_PATH)
+    print(f"Chips history plotted to {PLOT_PATH}")
 
     # Save the trained model
     print("Training finished. Saving model...")
     agent.save("pokerbot_dqn.pth")
+    agent.memory.flush()
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the DQN against the random agent.")
+    parser.add_argument('--resume', action='store_true', default=RESUME, help=f"continue from the latest checkpoint in {CHECKPOINT_PATH}")
+    train(parser.parse_args().resume)
\ No newline at end of file
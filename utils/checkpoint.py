@@ -0,0 +1,75 @@
+"""
+Training checkpoints written by a background thread. The training loop hands over a
+snapshot (copies of the weights, optimizer state, RNG states, ...) and carries on;
+the thread serializes it to a temporary file and renames it into place, so a crash
+never leaves a torn checkpoint. If the writer falls behind, only the newest pending
+snapshot is written rather than the loop waiting on the disk.
+"""
+import glob
+import os
+import threading
+import torch
+
+class AsyncCheckpointer:
+    """Writes checkpoint_<episode>.pt files to `path`, keeping the newest `keep`."""
+    def __init__(self, path, keep=2):
+        self.path = path
+        self.keep = keep
+        self.error = None
+        self._pending = None
+        self._closed = False
+        self._cond = threading.Condition()
+        os.makedirs(path, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='checkpointer', daemon=True)
+        self._thread.start()
+
+    def save(self, episode, state, on_write=None):
+        """Queues `state` for writing; `on_write` runs on the writer thread first (e.g. flushing an on-disk replay buffer)."""
+        if self.error is not None:
+            raise self.error
+        with self._cond:
+            self._pending = (episode, state, on_write) # Replaces a snapshot not yet written
+            self._cond.notify()
+
+    def close(self):
+        """Writes the last pending snapshot and stops the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                job, self._pending = self._pending, None
+            try:
+                self._write(*job)
+            except Exception as e: # Surfaced to the training loop by the next save() or close()
+                self.error = e
+
+    def _write(self, episode, state, on_write):
+        if on_write is not None:
+            on_write()
+        file = os.path.join(self.path, f"checkpoint_{episode:09d}.pt")
+        torch.save(state, file + '.tmp')
+        os.replace(file + '.tmp', file)
+        for old in checkpoints(self.path)[:-self.keep]:
+            os.remove(old)
+
+def checkpoints(path):
+    """Checkpoint files in `path`, oldest first."""
+    return sorted(glob.glob(os.path.join(path, 'checkpoint_*.pt')))
+
+def latest_checkpoint(path):
+    files = checkpoints(path) if path and os.path.isdir(path) else []
+    return files[-1] if files else None
+
+def load_checkpoint(file):
+    # Checkpoints hold Python RNG states and plain dicts alongside tensors
+    return torch.load(file, map_location='cpu', weights_only=False)
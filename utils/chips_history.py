@@ -0,0 +1,71 @@
+"""
+The learner's chips after every training hand, streamed to a CSV file (episode,
+chips, epsilon) instead of kept in memory, and plotted to an image without a display:
+
+    python -m utils.chips_history chips_history.csv --output chips_history.png
+"""
+import argparse
+import os
+import numpy as np
+
+class ChipsHistoryWriter:
+    """
+    Appends one line per episode to `path`. A run resuming at `start_episode` first
+    drops the lines of later episodes, which it is about to replay.
+    """
+    def __init__(self, path, start_episode=0):
+        self.path = path
+        lines = []
+        if start_episode and os.path.exists(path):
+            with open(path) as f:
+                lines = [line for line in f if line[0].isdigit() and int(line.split(',', 1)[0]) < start_episode]
+        self.file = open(path, 'w')
+        self.file.write('episode,chips,epsilon\n')
+        self.file.writelines(lines)
+
+    def write(self, episode, chips, epsilon):
+        self.file.write(f"{episode},{chips},{epsilon:.6f}\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def read_chips_history(path):
+    """(episodes, chips, epsilons) arrays."""
+    data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+    return data[:, 0].astype(np.int64), data[:, 1], data[:, 2]
+
+def plot_chips_history(history, output):
+    """
+    Plots a chips history (a sequence of values, or a CSV file written by
+    ChipsHistoryWriter) to the image file `output`. Draws on a bare Figure, so it never
+    opens a window or needs a display.
+    """
+    from matplotlib.figure import Figure
+    if isinstance(history, str):
+        episodes, chips, _ = read_chips_history(history)
+    else:
+        chips = np.asarray(history)
+        episodes = np.arange(len(chips))
+    fig = Figure(figsize=(10, 5))
+    ax = fig.add_subplot()
+    ax.plot(episodes, chips)
+    ax.set_title('DQN Bot P/L Over Time')
+    ax.set_xlabel('Episode')
+    ax.set_ylabel('Total Chips')
+    ax.grid(True)
+    fig.savefig(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Plot a training chips history to an image.")
+    parser.add_argument('history', help="CSV written during training, e.g. chips_history.csv")
+    parser.add_argument('--output', default=None, help="image file (default: the CSV's name with .png)")
+    args = parser.parse_args()
+    output = args.output or os.path.splitext(args.history)[0] + '.png'
+    plot_chips_history(args.history, output)
+    print(f"Wrote {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import queue
+import threading
+import numpy as np
+import torch
+
+# Transition fields, in the order every chunk and batch carries them
+FIELDS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+DTYPES = (np.float32, np.int64, np.float32, np.float32, np.float32)
+
+def replay_chunks(path, chunk_size=65536):
+    """
+    Streams the transitions of an on-disk ReplayBuffer directory (see REPLAY_PATH) as
+    chunks of `chunk_size` rows, oldest first, without loading the whole buffer.
+    Each chunk is a tuple of arrays in FIELDS order, copied out of the mapping.
+    """
+    capacity, _, position, size = (int(v) for v in np.load(os.path.join(path, 'header.npy')))
+    arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in FIELDS]
+    start = position if size == capacity else 0 # A full ring's oldest row is at the write cursor
+    for offset in range(0, size, chunk_size):
+        rows = (start + np.arange(offset, min(offset + chunk_size, size))) % capacity
+        if rows[-1] >= rows[0]:
+            rows = slice(rows[0], rows[-1] + 1) # Contiguous: a sequential read instead of a gather
+        yield tuple(np.array(array[rows]) for array in arrays)
+
+class _Stop:
+    """End-of-stream marker, carrying the producer's exception if it failed."""
+    def __init__(self, error=None):
+        self.error = error
+
+class StreamingLoader:
+    """
+    Iterates over minibatches of torch tensors (states, actions, rewards, next_states,
+    dones) decoded from a stream of transition chunks, for DQNAgent.learn.
+
+    `chunks` is a callable returning an iterable of chunks (tuples of arrays in FIELDS
+    order), such as `lambda: replay_chunks(path)`; it is called once per epoch. A
+    background thread pulls chunks, shuffles rows within a window of `shuffle_chunks`
+    chunks, slices batches and converts them to tensors, keeping up to `prefetch`
+    batches ready. Decoding (disk reads, hand re-simulation) therefore overlaps the
+    gradient steps, and memory stays bounded by the window, whatever the data size.
+    Rows left over after a window's full batches join the next window, so only an
+    epoch's last batch smaller than `batch_size` is dropped.
+    """
+    def __init__(self, chunks, batch_size=64, epochs=1, shuffle_chunks=4, prefetch=8, seed=None):
+        self.chunks = chunks
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.shuffle_chunks = shuffle_chunks
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+        batches = queue.Queue(self.prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(target=self._produce, args=(batches, stop), daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch = batches.get()
+                if isinstance(batch, _Stop):
+                    if batch.error is not None:
+                        raise batch.error
+                    return
+                yield batch
+        finally:
+            # Consumer stopped early (break, exception): unblock and retire the producer
+            stop.set()
+            while thread.is_alive():
+                try:
+                    batches.get_nowait()
+                except queue.Empty:
+                    thread.join(0.01)
+
+    def _produce(self, batches, stop):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            for _ in range(self.epochs):
+                window, rest = [], []
+                for chunk in self.chunks():
+                    window.append(chunk)
+                    if len(window) >= self.shuffle_chunks:
+                        rest = self._emit(rest + window, put)
+                        if rest is None:
+                            return
+                        window = []
+                if (window or rest) and self._emit(rest + window, put) is None:
+                    return
+            put(_Stop())
+        except Exception as error:
+            put(_Stop(error))
+
+    def _emit(self, window, put):
+        """
+        Shuffles a window of chunks and puts its full batches. Returns the leftover rows
+        as a list of at most one chunk, or None once the consumer has gone.
+        """
+        fields = [np.concatenate(column) if len(window) > 1 else column[0] for column in zip(*window)]
+        order = self.rng.permutation(len(fields[0]))
+        end = len(order) - len(order) % self.batch_size
+        for start in range(0, end, self.batch_size):
+            idx = order[start:start + self.batch_size]
+            if not put(tuple(torch.from_numpy(field[idx]) for field in fields)):
+                return None
+        return [tuple(field[order[end:]] for field in fields)] if end < len(order) else []
@@ -0,0 +1,98 @@
+import numpy as np
+import torch
+from .replay_buffer import ReplayBuffer
+
+class SumTree:
+    """
+    Array-backed binary sum-tree over `capacity` leaf priorities (rounded up to a power
+    of two). Node i holds the sum of its children 2i and 2i+1; the root is node 1.
+    Updates and prefix-sum lookups take O(log N) and are vectorized over batches.
+    """
+    def __init__(self, capacity):
+        self.num_leaves = 1 << max(0, (capacity - 1).bit_length())
+        self.depth = self.num_leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.num_leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices) + self.num_leaves
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = nodes // 2
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """Returns the leaf index whose prefix-sum interval contains each value."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return nodes - self.num_leaves
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized replay: transitions are sampled with probability
+    p_i^alpha / sum_k p_k^alpha, and each sample carries an importance-sampling weight
+    (N * P(i))^-beta, normalized by the batch maximum. New transitions get the highest
+    priority seen so far so they are replayed at least once.
+
+    Priorities are kept in memory only; a resumed on-disk buffer starts with every
+    stored transition at priority 1.
+    """
+    def __init__(self, capacity, state_dim, alpha=0.6, epsilon=1e-6, path=None, seed=None, features=None):
+        super().__init__(capacity, state_dim, path, seed, features)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+        if self.size:
+            self.tree.update(np.arange(self.size), np.ones(self.size))
+
+    def push(self, s, a, r, s_, done):
+        i = self.position
+        super().push(s, a, r, s_, done)
+        self.tree.update([i], self.max_priority ** self.alpha)
+
+    def push_batch(self, s, a, r, s_, done):
+        n = min(len(a), self.capacity)
+        idx = (self.position + np.arange(n)) % self.capacity
+        super().push_batch(s, a, r, s_, done)
+        self.tree.update(idx, np.full(n, self.max_priority ** self.alpha))
+
+    def sample(self, batch_size, beta=0.4):
+        """
+        Returns (s, a, r, s_, d, weights, indices). Draws are stratified: one per equal
+        slice of the total priority mass.
+        """
+        total = self.tree.total()
+        targets = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        # Float round-off can walk past the last filled slot
+        idx = np.minimum(self.tree.find(targets), self.size - 1)
+
+        probs = self.tree.tree[idx + self.tree.num_leaves] / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return (*self._gather(idx), torch.from_numpy(weights.astype(np.float32)), idx)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def state_dict(self, include_data=True):
+        state = super().state_dict(include_data)
+        if 'states' in state: # Priorities only make sense alongside the transitions they belong to
+            state['tree'] = self.tree.tree.copy()
+            state['max_priority'] = self.max_priority
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        if 'tree' in state:
+            self.tree.tree[:] = state['tree']
+            self.max_priority = state['max_priority']
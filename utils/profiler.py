@@ -0,0 +1,127 @@
+import json
+import time
+from contextlib import nullcontext
+
+# Returned for every section while profiling is off, so disabled timers cost one call
+_NULL_SECTION = nullcontext()
+
+class _Section:
+    """Reusable timer for one named section; adds elapsed time and a call to `stats`."""
+    __slots__ = ('stats', 'start')
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stats[0] += time.perf_counter() - self.start
+        self.stats[1] += 1
+
+class Profiler:
+    """
+    Opt-in wall-clock timers and counters for the training and evaluation hot paths.
+
+        with PROFILER.section('env_step'):
+            env.step(action)
+        PROFILER.count('decisions')
+
+    Sections may nest (e.g. evaluate_hand runs inside env_step), so their times are
+    inclusive and the shares don't add up to 1. `report()` closes the current window,
+    prints a one-line summary and appends a JSON record to `metrics_path`: hands,
+    decisions and gradient steps per second from the 'hands', 'decisions' and
+    'grad_steps' counters, plus the time, calls and share of the window spent in each
+    section. Worker processes can ship their numbers to the parent with take()/merge().
+    """
+    def __init__(self, enabled=False, metrics_path=None):
+        self.configure(enabled, metrics_path)
+
+    def configure(self, enabled, metrics_path=None):
+        self.enabled = enabled
+        self.metrics_path = metrics_path
+        self.sections = {} # name -> [seconds, calls] for the current window
+        self.counters = {}
+        self.totals = {'sections': {}, 'counters': {}}
+        self._handles = {}
+        self.run_start = self.window_start = time.perf_counter()
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL_SECTION
+        handle = self._handles.get(name)
+        if handle is None:
+            handle = self._handles[name] = _Section(self.sections.setdefault(name, [0.0, 0]))
+        return handle
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def take(self):
+        """Returns this window's raw section times and counters and zeroes them."""
+        raw = {'sections': {name: tuple(stats) for name, stats in self.sections.items()}, 'counters': self.counters}
+        for stats in self.sections.values():
+            stats[0], stats[1] = 0.0, 0 # In place, so cached section handles stay valid
+        self.counters = {}
+        return raw
+
+    def merge(self, raw):
+        """Adds raw numbers from take() (e.g. from a worker process) into this window."""
+        for name, (seconds, calls) in raw['sections'].items():
+            stats = self.sections.setdefault(name, [0.0, 0])
+            stats[0] += seconds
+            stats[1] += calls
+        for name, n in raw['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self, final=False, **fields):
+        """
+        Closes the current window and returns its metrics record, also printed and
+        written to `metrics_path`. With `final`, the record covers the whole run.
+        Extra keyword fields (episode, epsilon, ...) are added to the record.
+        """
+        if not self.enabled:
+            return None
+        now = time.perf_counter()
+        raw = self.take()
+        for name, (seconds, calls) in raw['sections'].items():
+            totals = self.totals['sections'].setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+        for name, n in raw['counters'].items():
+            self.totals['counters'][name] = self.totals['counters'].get(name, 0) + n
+        if final:
+            raw = self.totals
+            elapsed = now - self.run_start
+        else:
+            elapsed = now - self.window_start
+        self.window_start = now
+
+        counters = raw['counters']
+        elapsed = max(elapsed, 1e-9)
+        record = {
+            'timestamp': time.time(), 'final': final, **fields, 'elapsed': round(elapsed, 4),
+            'hands_per_sec': round(counters.get('hands', 0) / elapsed, 2),
+            'decisions_per_sec': round(counters.get('decisions', 0) / elapsed, 2),
+            'grad_steps_per_sec': round(counters.get('grad_steps', 0) / elapsed, 2),
+            'counters': counters,
+            'sections': {
+                name: {'seconds': round(seconds, 4), 'calls': calls,
+                       'us_per_call': round(seconds / calls * 1e6, 2) if calls else 0.0,
+                       'share': round(seconds / elapsed, 4)}
+                for name, (seconds, calls) in sorted(raw['sections'].items(), key=lambda item: -item[1][0])
+            }
+        }
+
+        breakdown = ", ".join(f"{name} {s['share']:.0%}" for name, s in record['sections'].items())
+        print(f"[profile{' total' if final else ''}] {record['hands_per_sec']:.0f} hands/s, "
+              f"{record['decisions_per_sec']:.0f} decisions/s, {record['grad_steps_per_sec']:.0f} grad steps/s | {breakdown}")
+        if self.metrics_path:
+            with open(self.metrics_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+# Process-wide profiler, switched on by the entry points when PROFILE is set
+PROFILER = Profiler()
@@ -1,19 +1,153 @@
-import random
+import json
+import os
 import numpy as np
+import torch
+
+# Header fields of an on-disk buffer, stored as int64 in header.npy
+HEADER_FIELDS = ('capacity', 'state_dim', 'position', 'size')
+TRANSITION_FIELDS = ('states', 'actions', 'rewards', 'next_states', 'dones')
 
 class ReplayBuffer:
-    def __init__(self, capacity):
+    """
+    Ring buffer of transitions backed by preallocated contiguous arrays, one per field.
+    States are stored as float32, so a sampled batch is gathered with one fancy index
+    per field and handed to torch without another copy.
+
+    With `path`, the arrays are fixed-width .npy files memory-mapped from that directory,
+    plus a small header holding the capacity and write cursor. Only the pages being
+    touched need to be resident, and reopening the same path resumes the buffer.
+    `features` (a JSON-able description of the state encoding, e.g. Observer.config())
+    is stored alongside, and a buffer is only reopened under the same one.
+    """
+    def __init__(self, capacity, state_dim, path=None, seed=None, features=None):
         self.capacity = capacity
-        self.buffer = []
+        self.state_dim = state_dim
+        self.features = features
+        self.path = path
         self.position = 0
+        self.size = 0
+        self.header = None
+        fields = (('states', (capacity, state_dim), np.float32), ('actions', (capacity,), np.int64),
+                  ('rewards', (capacity,), np.float32), ('next_states', (capacity, state_dim), np.float32),
+                  ('dones', (capacity,), np.float32))
+        if path is None:
+            for name, shape, dtype in fields:
+                setattr(self, name, np.zeros(shape, dtype=dtype))
+        else:
+            self._open(fields)
+        self.rng = np.random.default_rng(seed)
+
+    def _open(self, fields):
+        header_file = os.path.join(self.path, 'header.npy')
+        features_file = os.path.join(self.path, 'features.json')
+        resume = os.path.exists(header_file)
+        if resume:
+            self.header = np.lib.format.open_memmap(header_file, mode='r+')
+            capacity, state_dim, position, size = (int(v) for v in self.header)
+            if (capacity, state_dim) != (self.capacity, self.state_dim):
+                raise ValueError(f"Replay buffer at {self.path} has capacity {capacity} and state_dim {state_dim}, "
+                                 f"expected {self.capacity} and {self.state_dim}")
+            features = None
+            if os.path.exists(features_file):
+                with open(features_file) as f:
+                    features = json.load(f)
+            if features != self.features:
+                raise ValueError(f"Replay buffer at {self.path} holds states encoded with {features}, expected "
+                                 f"{self.features}; delete it to start from an empty buffer")
+            self.position, self.size = position, size
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            with open(features_file, 'w') as f:
+                json.dump(self.features, f)
+
+        self._maps = []
+        for name, shape, dtype in fields:
+            file = os.path.join(self.path, f"{name}.npy")
+            if resume:
+                array = np.lib.format.open_memmap(file, mode='r+')
+            else:
+                # Sparse on most filesystems: disk blocks are only allocated as rows are written
+                array = np.lib.format.open_memmap(file, mode='w+', dtype=dtype, shape=shape)
+            self._maps.append(array)
+            # Plain ndarray view of the mapping, without np.memmap's per-index overhead
+            setattr(self, name, np.asarray(array))
+
+        if not resume:
+            # Written last, so a buffer whose data files failed to create is never resumed
+            self.header = np.lib.format.open_memmap(header_file, mode='w+', dtype=np.int64, shape=(len(HEADER_FIELDS),))
+            self._write_header()
+
+    def _write_header(self):
+        if self.header is not None:
+            self.header[:] = (self.capacity, self.state_dim, self.position, self.size)
+
     def push(self, s, a, r, s_, done):
-        if len(self.buffer) < self.capacity:
-            self.buffer.append(None)
-        self.buffer[self.position] = (s, a, r, s_, done)
+        i = self.position
+        self.states[i] = s
+        self.actions[i] = a
+        self.rewards[i] = r
+        self.next_states[i] = s_
+        self.dones[i] = done
         self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self._write_header()
+
+    def push_batch(self, s, a, r, s_, done):
+        """Appends N transitions given as stacked arrays, wrapping around the ring."""
+        n = len(a)
+        if n > self.capacity:
+            # Only the newest `capacity` transitions would survive anyway
+            s, a, r, s_, done = s[-self.capacity:], a[-self.capacity:], r[-self.capacity:], s_[-self.capacity:], done[-self.capacity:]
+            n = self.capacity
+        idx = (self.position + np.arange(n)) % self.capacity
+        self.states[idx] = s
+        self.actions[idx] = a
+        self.rewards[idx] = r
+        self.next_states[idx] = s_
+        self.dones[idx] = done
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        self._write_header()
+
     def sample(self, batch_size):
-        batch = random.sample(self.buffer, batch_size)
-        s, a, r, s_, d = map(np.array, zip(*batch))
-        return s, a, r, s_, d
+        """Returns a uniformly sampled batch as torch tensors sharing memory with the gathered arrays."""
+        idx = self.rng.integers(0, self.size, size=batch_size)
+        # Gathering in file order keeps reads from a large on-disk buffer sequential-ish
+        idx.sort()
+        return self._gather(idx)
+
+    def _gather(self, idx):
+        return (torch.from_numpy(self.states[idx]), torch.from_numpy(self.actions[idx]),
+                torch.from_numpy(self.rewards[idx]), torch.from_numpy(self.next_states[idx]),
+                torch.from_numpy(self.dones[idx]))
+
+    def state_dict(self, include_data=True):
+        """
+        Write cursor and sampling RNG, plus (with `include_data`) a copy of the stored
+        transitions. An on-disk buffer's data is never copied: it already persists at `path`.
+        """
+        state = {'position': self.position, 'size': self.size, 'rng': self.rng.bit_generator.state}
+        if include_data and self.path is None:
+            for name in TRANSITION_FIELDS:
+                state[name] = getattr(self, name)[:self.size].copy()
+        return state
+
+    def load_state_dict(self, state):
+        self.rng.bit_generator.state = state['rng']
+        if 'states' in state:
+            for name in TRANSITION_FIELDS:
+                getattr(self, name)[:len(state[name])] = state[name]
+        # An on-disk buffer keeps its data but goes back to the checkpoint's cursor; rows
+        # written after the checkpoint stay until the ring overwrites them
+        self.position, self.size = state['position'], state['size']
+        self._write_header()
+
+    def flush(self):
+        """Writes dirty pages of an on-disk buffer back to its files."""
+        if self.path is not None:
+            for array in self._maps:
+                array.flush()
+            self.header.flush()
+
     def __len__(self):
-        return len(self.buffer)
\ No newline at end of file
+        return self.size